@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Sample resume fixtures for the benchmarks.
+
+The files are generated rather than checked in so their size can be scaled:
+`pages` controls how many times the sample resume is repeated in the PDF.
+"""
+import argparse
+import os
+
+from docx import Document
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SAMPLE_RESUME = [
+    "Jane Doe",
+    "Berlin, Germany | jane.doe@example.com | +49 123 456789 | linkedin.com/in/janedoe",
+    "Professional Summary",
+    "Backend engineer with 6 years of experience building Python services and data pipelines.",
+    "Experience",
+    "Senior Backend Engineer, Acme Corp, Jan 2021 - Present",
+    "- Reduced p99 API latency by 45% by introducing connection pooling and Redis caching",
+    "- Led migration of 12 services to Kubernetes, cutting infrastructure cost by 30%",
+    "- Mentored 4 engineers and introduced code review guidelines",
+    "Backend Engineer, Globex, Jun 2018 - Dec 2020",
+    "- Built FastAPI services handling 2M requests per day",
+    "- Designed PostgreSQL schemas and reporting jobs for the finance team",
+    "Education",
+    "BSc Computer Science, State University, 2018, GPA 3.7",
+    "Certifications",
+    "AWS Certified Developer - Associate",
+    "Projects",
+    "Job Tracker - FastAPI, React: tracks 500+ job applications with reminders",
+    "Languages and Personal Info",
+    "English (fluent), German (B2), Driving License B",
+    "Technical Skills",
+    "Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, Terraform, CI/CD",
+]
+
+SAMPLE_JOB_DESCRIPTION = (
+    "We are looking for a Backend Engineer to design and operate Python APIs. "
+    "You will work with FastAPI, PostgreSQL, Redis and AWS, own services in production, "
+    "and collaborate closely with product and data teams. Experience with Kubernetes, "
+    "observability and CI/CD is a plus. Strong communication and ownership are essential."
+)
+
+
+def pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int = 1):
+    """Write a text PDF with the sample resume on each of `pages` pages."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>")
+    font_id = 3 + pages * 2
+    for _ in range(pages):
+        lines = " ".join(f"({pdf_escape(line)}) Tj T*" for line in SAMPLE_RESUME)
+        stream = f"BT /F1 10 Tf 14 TL 50 760 Td {lines} ET"
+        page_id = len(objects) + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page_id + 1} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    with open(path, "w", encoding="latin-1") as f:
+        f.write(out)
+
+
+def write_docx(path: str):
+    doc = Document()
+    for line in SAMPLE_RESUME:
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def ensure_fixtures(pages: int = 1) -> dict:
+    """Create the fixtures if needed and return their paths by file type."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    paths = {
+        "pdf": os.path.join(FIXTURES_DIR, f"sample_resume_{pages}p.pdf"),
+        "docx": os.path.join(FIXTURES_DIR, "sample_resume.docx"),
+    }
+    if not os.path.exists(paths["pdf"]):
+        write_pdf(paths["pdf"], pages)
+    if not os.path.exists(paths["docx"]):
+        write_docx(paths["docx"])
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate benchmark resume fixtures")
+    parser.add_argument("--pages", type=int, default=1, help="pages in the sample PDF")
+    for file_type, path in ensure_fixtures(parser.parse_args().pages).items():
+        print(f"{file_type}: {path}")
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the resume generator API.
+
+    python bench/run_bench.py load --requests 50 --concurrency 10
+    python bench/run_bench.py micro --iterations 200
+
+`load` starts the stub LLM (bench/stub_llm.py) and the API with uvicorn, points
+OPENROUTER_API_URL at the stub, drives /generate-resume at the requested
+concurrency and reports throughput, end-to-end latency percentiles and per-stage
+percentiles taken from the API's /metrics histograms. Pass --api-url to drive an
+already running server instead (it must be configured to use the stub).
+
+`micro` times text extraction, LaTeX sanitization, template rendering and the
+LaTeX compile in-process. The compile benchmark is skipped when pdflatex is not installed.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import SAMPLE_JOB_DESCRIPTION, ensure_fixtures  # noqa: E402
+
+STAGE_HISTOGRAMS = {
+    "extraction": "resume_extraction_seconds",
+    "section": "resume_section_generation_seconds",
+    "llm_call": "resume_llm_call_seconds",
+    "latex_pass": "resume_latex_pass_seconds",
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def histogram_buckets(metrics_text: str) -> Dict[str, Dict[float, float]]:
+    """Cumulative bucket counts per stage histogram, summed over all labels."""
+    buckets: Dict[str, Dict[float, float]] = {stage: {} for stage in STAGE_HISTOGRAMS}
+    names = {name: stage for stage, name in STAGE_HISTOGRAMS.items()}
+    for family in text_string_to_metric_families(metrics_text):
+        stage = names.get(family.name)
+        if not stage:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                bound = float(sample.labels["le"])
+                buckets[stage][bound] = buckets[stage].get(bound, 0) + sample.value
+    return buckets
+
+
+def histogram_quantile(buckets: Dict[float, float], q: float) -> Optional[float]:
+    """Estimate a quantile from cumulative buckets, interpolating inside a bucket like PromQL."""
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] == 0:
+        return None
+    rank = q * buckets[bounds[-1]]
+    previous_bound, previous_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == float("inf"):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return bounds[-1]
+
+
+def stage_report(before: str, after: str):
+    start, end = histogram_buckets(before), histogram_buckets(after)
+    print(f"\n{'stage':<12} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for stage in STAGE_HISTOGRAMS:
+        delta = {bound: end[stage].get(bound, 0) - start[stage].get(bound, 0) for bound in end[stage]}
+        total = delta.get(float("inf"), 0)
+        if not total:
+            print(f"{stage:<12} {0:>7}")
+            continue
+        p50, p95, p99 = (histogram_quantile(delta, q) for q in (0.5, 0.95, 0.99))
+        print(f"{stage:<12} {int(total):>7} {p50:>8.3f}s {p95:>8.3f}s {p99:>8.3f}s")
+
+
+async def drive_load(api_url: str, fixture: str, requests: int, concurrency: int, timeout: float) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    with open(fixture, "rb") as f:
+        resume_bytes = f.read()
+    filename = os.path.basename(fixture)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout) as client:
+        async def one(index: int):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/generate-resume",
+                        data={
+                            "name": f"Bench {index}",
+                            "email": "bench@example.com",
+                            "phone": "+1 555 0100",
+                            "linkedin_link": "https://linkedin.com/in/bench",
+                            "location": "Remote",
+                            # Vary the posting so section caches do not short-circuit the run
+                            "job_description": f"{SAMPLE_JOB_DESCRIPTION} Req #{index}.",
+                        },
+                        files={"resume_file": (filename, resume_bytes)},
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(requests)])
+        elapsed = time.perf_counter() - started
+
+    return {"elapsed": elapsed, "latencies": latencies, "statuses": statuses}
+
+
+def start_process(args: List[str], env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def run_load(args):
+    fixture = ensure_fixtures(args.pages)[args.fixture]
+    processes = []
+    log_dir = tempfile.mkdtemp(prefix="resume_bench_")
+    api_url = args.api_url
+    try:
+        if not api_url:
+            stub_port, api_port = free_port(), free_port()
+            processes.append(start_process([
+                sys.executable, os.path.join(BENCH_DIR, "stub_llm.py"), "--port", str(stub_port),
+                "--latency", str(args.stub_latency), "--jitter", str(args.stub_jitter),
+                "--error-rate", str(args.stub_error_rate), "--shape", args.stub_shape,
+            ], os.environ.copy(), os.path.join(log_dir, "stub.log")))
+            wait_for(f"http://127.0.0.1:{stub_port}/health")
+
+            env = os.environ.copy()
+            env.update({
+                "AI_PROVIDER": "openrouter",
+                "OPENROUTER_API_KEY": "stub",
+                "OPENROUTER_API_URL": f"http://127.0.0.1:{stub_port}/v1/chat/completions",
+                "GROQ_API_KEY": "",
+                "PROVIDER_FAILOVER": "false",
+                "SECTION_CACHE_BACKEND": "none",
+                "EXTRACTION_CACHE_SIZE": "0" if args.no_extraction_cache else env.get("EXTRACTION_CACHE_SIZE", "256"),
+            })
+            processes.append(start_process([
+                sys.executable, "-m", "uvicorn", "resume_generator_api:app",
+                "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning",
+            ], env, os.path.join(log_dir, "api.log")))
+            api_url = f"http://127.0.0.1:{api_port}"
+            wait_for(f"{api_url}/health")
+
+        if not shutil.which("pdflatex"):
+            print("warning: pdflatex not found, /generate-resume will fail at the compile stage")
+
+        before = httpx.get(f"{api_url}/metrics").text
+        result = asyncio.run(drive_load(api_url, fixture, args.requests, args.concurrency, args.timeout))
+        after = httpx.get(f"{api_url}/metrics").text
+
+        latencies = result["latencies"]
+        print(f"requests: {args.requests}  concurrency: {args.concurrency}  fixture: {os.path.basename(fixture)}")
+        print(f"statuses: {dict(sorted(result['statuses'].items()))}")
+        print(f"throughput: {args.requests / result['elapsed']:.2f} req/s over {result['elapsed']:.1f}s")
+        print(
+            f"end-to-end: p50 {percentile(latencies, 50):.3f}s  p95 {percentile(latencies, 95):.3f}s  "
+            f"p99 {percentile(latencies, 99):.3f}s"
+        )
+        stage_report(before, after)
+        if processes:
+            print(f"\nserver logs: {log_dir}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def time_calls(label: str, iterations: int, func):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    print(
+        f"{label:<22} n={iterations:<5} mean {statistics.mean(samples) * 1000:9.3f}ms  "
+        f"p50 {percentile(samples, 50) * 1000:9.3f}ms  p95 {percentile(samples, 95) * 1000:9.3f}ms"
+    )
+
+
+def run_micro(args):
+    # Measure the real work, not cache hits
+    os.environ["EXTRACTION_CACHE_SIZE"] = "0"
+    os.environ["EXTRACTION_CACHE_DIR"] = ""
+    os.environ["SECTION_CACHE_BACKEND"] = "none"
+    os.chdir(SERVER_DIR)
+    sys.path.insert(0, SERVER_DIR)
+    import resume_generator_api as api
+    from stub_llm import SECTION_BODIES
+
+    fixtures = ensure_fixtures(args.pages)
+    latex = "\n\n".join(SECTION_BODIES.values())
+    loop = asyncio.new_event_loop()
+
+    for file_type, path in fixtures.items():
+        time_calls(f"extract ({file_type})", args.iterations,
+                   lambda: loop.run_until_complete(api.extract_text_from_file(path)))
+    time_calls("sanitize_latex_simple", args.iterations * 10, lambda: api.sanitize_latex_simple(latex))
+    template = api.template_registry.get(api.DEFAULT_TEMPLATE)
+    values = {field: "Jane Doe" for field in api.TEMPLATE_CONTACT_FIELDS}
+    values["AI Content"] = api.sanitize_latex_simple(latex)
+    time_calls("template render", args.iterations * 10, lambda: template.render(values))
+
+    if shutil.which("pdflatex"):
+        body = template.render(values)
+        with tempfile.TemporaryDirectory() as out_dir:
+            pdf_path = os.path.join(out_dir, "resume.pdf")
+            compile_iterations = max(1, args.iterations // 20)
+            time_calls("latex compile", compile_iterations,
+                       lambda: loop.run_until_complete(api.generate_pdf_from_latex(template, body, pdf_path)))
+    else:
+        print("latex compile          skipped (pdflatex not installed)")
+
+    loop.run_until_complete(api.stop_latex_workers())
+    loop.run_until_complete(api.stop_extraction_pool())
+    loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the resume generator API")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    load = subcommands.add_parser("load", help="drive /generate-resume against a stub LLM")
+    load.add_argument("--requests", type=int, default=20)
+    load.add_argument("--concurrency", type=int, default=5)
+    load.add_argument("--fixture", choices=["pdf", "docx"], default="pdf")
+    load.add_argument("--pages", type=int, default=1, help="pages in the generated PDF fixture")
+    load.add_argument("--stub-latency", type=float, default=0.5)
+    load.add_argument("--stub-jitter", type=float, default=0.1)
+    load.add_argument("--stub-error-rate", type=float, default=0.0)
+    load.add_argument("--stub-shape", choices=["valid", "fenced", "invalid"], default="valid")
+    load.add_argument("--no-extraction-cache", action="store_true", help="parse the upload on every request")
+    load.add_argument("--timeout", type=float, default=300)
+    load.add_argument("--api-url", help="use an already running API instead of starting one")
+    load.set_defaults(func=run_load)
+
+    micro = subcommands.add_parser("micro", help="time extraction, sanitization and LaTeX compile in-process")
+    micro.add_argument("--iterations", type=int, default=50)
+    micro.add_argument("--pages", type=int, default=1, help="pages in the generated PDF fixture")
+    micro.set_defaults(func=run_micro)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible chat completion stub used by the benchmarks.
+
+Answers the prompts sent by resume_generator_api.py with well-formed content
+(a LaTeX section, a JSON profile or a delimited multi-section document) so the
+whole pipeline can run without network access. Behaviour is configured with
+environment variables or the matching command-line flags:
+
+    STUB_LATENCY      mean response latency in seconds (default 0.5)
+    STUB_JITTER       uniform +/- jitter in seconds (default 0.1)
+    STUB_ERROR_RATE   fraction of requests answered with HTTP 500 (default 0)
+    STUB_429_RATE     fraction of requests answered with HTTP 429 (default 0)
+    STUB_SHAPE        "valid", "fenced" (wrapped in ```latex fences) or
+                      "invalid" (fails section validation) (default valid)
+
+Requests with "stream": true are answered with OpenAI-style SSE chunks: the
+first chunk arrives after a tenth of the latency, the rest spread over the
+remainder.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Stub LLM")
+
+config = {
+    "latency": float(os.getenv("STUB_LATENCY", "0.5")),
+    "jitter": float(os.getenv("STUB_JITTER", "0.1")),
+    "error_rate": float(os.getenv("STUB_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("STUB_429_RATE", "0")),
+    "shape": os.getenv("STUB_SHAPE", "valid"),
+}
+
+SECTION_BODIES = {
+    "Professional Summary": (
+        "\\section{Professional Summary}\n"
+        "Backend Engineer with 5+ years in Python, FastAPI and PostgreSQL, delivering low-latency APIs.\n"
+        "Built event-driven services on AWS and Kubernetes serving 2M requests per day.\n"
+        "Strong in collaboration and ownership, mentoring engineers across teams."
+    ),
+    "Technical Skills": (
+        "\\subsection{Technical Skills}\n"
+        "Python, FastAPI, PostgreSQL, Redis, Docker, Kubernetes, AWS, CI/CD. Familiar with Go and Terraform."
+    ),
+    "Education": (
+        "\\section{Education}\n"
+        "\\textbf{BSc Computer Science} \\hfill \\textit{2018} \\\\\n"
+        "\\textit{State University}"
+    ),
+    "Certifications": (
+        "\\section{Certifications}\n"
+        "\\begin{itemize}\n\\item AWS Certified Developer -- Associate\n\\end{itemize}"
+    ),
+    "Experience": (
+        "\\section{Experience}\n"
+        "\\textbf{Senior Backend Engineer} | \\textit{Acme Corp} \\hfill \\textit{Jan 2021 -- Present}\n"
+        "\\begin{itemize}\n"
+        "  \\item Cut p99 API latency by 45\\% by introducing connection pooling and Redis caching\n"
+        "  \\item Migrated 12 services to Kubernetes, reducing infrastructure cost by 30\\%\n"
+        "\\end{itemize}"
+    ),
+    "Projects": (
+        "\\section{Projects}\n"
+        "\\textbf{Job Tracker} | FastAPI, React\\\\\n"
+        "\\begin{itemize}\n\\item Tracks 500+ applications with automated reminders\n\\end{itemize}"
+    ),
+    "Languages and Personal Info": (
+        "\\section{Languages and Personal Info}\n"
+        "Languages: English (fluent), German (B2). Driving License: B"
+    ),
+}
+
+PROFILE = {
+    "job": {
+        "job_title": "Backend Engineer",
+        "keywords": ["Python", "FastAPI", "PostgreSQL", "AWS", "Kubernetes"],
+        "tools": ["Docker", "Redis"],
+        "responsibilities": ["design APIs", "own services in production"],
+        "soft_skills": ["collaboration", "ownership"],
+    },
+    "candidate": {
+        "headline": "Senior Backend Engineer",
+        "years_experience": "5",
+        "roles": [{
+            "title": "Senior Backend Engineer", "company": "Acme Corp", "start": "Jan 2021", "end": "Present",
+            "highlights": ["cut p99 latency by 45%", "migrated 12 services to Kubernetes"],
+        }],
+        "skills": ["Python", "FastAPI", "PostgreSQL"],
+        "education": [{"degree": "BSc Computer Science", "institution": "State University", "year": "2018"}],
+        "certifications": ["AWS Certified Developer"],
+        "languages": ["English", "German"],
+    },
+}
+
+SINGLE_SECTION_PATTERN = re.compile(r"Generate ONLY the (.+?) (?:sub)?section")
+MULTI_SECTION_PATTERN = re.compile(r"in this order: (.+?)\.\n")
+
+
+def build_content(prompt: str) -> str:
+    if "JSON structure" in prompt:
+        return json.dumps(PROFILE)
+
+    multi = MULTI_SECTION_PATTERN.search(prompt)
+    if multi:
+        names = [name.strip() for name in multi.group(1).split(",")]
+        return "\n".join(f"%%% SECTION: {name} %%%\n{section_body(name)}" for name in names)
+
+    single = SINGLE_SECTION_PATTERN.search(prompt)
+    return section_body(single.group(1) if single else "Professional Summary")
+
+
+def section_body(name: str) -> str:
+    if config["shape"] == "invalid":
+        return "Sorry, I cannot help with that."
+    body = SECTION_BODIES.get(name, f"\\section{{{name}}}\nPlaceholder")
+    if config["shape"] == "fenced":
+        return f"```latex\n{body}\n```"
+    return body
+
+
+STREAM_CHUNK_WORDS = 4
+
+
+def usage_for(prompt: str, content: str) -> dict:
+    return {
+        "prompt_tokens": len(prompt) // 4,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": (len(prompt) + len(content)) // 4,
+    }
+
+
+async def stream_completion(model: str, prompt: str, content: str, latency: float):
+    words = re.split(r"(?<=\s)", content)
+    chunks = ["".join(words[i:i + STREAM_CHUNK_WORDS]) for i in range(0, len(words), STREAM_CHUNK_WORDS)]
+    await asyncio.sleep(latency * 0.1)
+    for chunk in chunks:
+        data = {"id": "stub", "object": "chat.completion.chunk", "model": model,
+                "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+        yield f"data: {json.dumps(data)}\n\n"
+        await asyncio.sleep(latency * 0.9 / len(chunks))
+    final = {"id": "stub", "object": "chat.completion.chunk", "model": model,
+             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage_for(prompt, content)}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    latency = max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"]))
+    if not payload.get("stream"):
+        await asyncio.sleep(latency)
+
+    roll = random.random()
+    if roll < config["error_rate"]:
+        return JSONResponse(status_code=500, content={"error": {"message": "stub failure"}})
+    if roll < config["error_rate"] + config["rate_limit_rate"]:
+        return JSONResponse(status_code=429, content={"error": {"message": "stub rate limit"}},
+                            headers={"retry-after": "1"})
+
+    prompt = "\n".join(message.get("content", "") for message in payload.get("messages", []))
+    content = build_content(prompt)
+    if payload.get("stream"):
+        return StreamingResponse(
+            stream_completion(payload.get("model", "stub"), prompt, content, latency), media_type="text/event-stream"
+        )
+    return {
+        "id": "stub",
+        "object": "chat.completion",
+        "model": payload.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage_for(prompt, content),
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", **config}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=config["latency"])
+    parser.add_argument("--jitter", type=float, default=config["jitter"])
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"])
+    parser.add_argument("--rate-limit-rate", type=float, default=config["rate_limit_rate"])
+    parser.add_argument("--shape", choices=["valid", "fenced", "invalid"], default=config["shape"])
+    args = parser.parse_args()
+
+    config.update(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, shape=args.shape
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
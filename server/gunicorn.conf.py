@@ -0,0 +1,61 @@
+"""
+Production serving profile: gunicorn managing uvicorn workers.
+
+    gunicorn resume_generator_api:app    # run from this directory, which picks up this file
+
+The app is imported once in the master and the workers are forked from it, so
+they share its code pages. Each worker then starts its own event loop, HTTP
+client, pdflatex pools and job workers from the app's startup hooks. The worker
+count defaults to the CPUs available to the process; WEB_CONCURRENCY overrides it.
+"""
+import os
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+# gunicorn -c may point here from another directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cpu_limits import available_cpus  # noqa: E402
+
+# Settings such as WEB_CONCURRENCY may come from .env, which the app only reads later
+load_dotenv()
+
+workers = int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+# The app splits its CPU pools and LLM budgets between this many workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+preload_app = True
+# Workers are restarted when their event loop stops answering for this long, not per request,
+# so long generations and progress streams are unaffected
+timeout = 120
+graceful_timeout = 60
+keepalive = 5
+
+# /metrics aggregates every worker's samples from this directory
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="resume_metrics_")
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def post_fork(server, worker):
+    # The preloaded app's log writer thread stayed in the master
+    app_module = sys.modules.get("resume_generator_api")
+    if app_module is not None:
+        app_module.restart_log_listener()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
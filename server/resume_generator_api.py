@@ -1,35 +1,170 @@
 #!/usr/bin/env python3
 import os
+import atexit
 import tempfile
 import asyncio
 import shutil
+import hashlib
+import html
+import itertools
+import sqlite3
+import threading
+import json
+import zipfile
 import logging
-from typing import List, Optional
+import logging.handlers
+import queue
+import random
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import quote
 import uuid
 import time
 import re
-import requests
-import PyPDF2
-from docx import Document
+import httpx
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
+from cpu_limits import available_cpus
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
 
 # Load environment variables
 load_dotenv()
 
 # Setup Logging
-LOG_FILE = os.path.join(os.path.dirname(__file__), 'api.log')
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# "-" logs to stderr, for journald or docker logs; use it when several workers would rotate one file
+LOG_FILE = os.getenv("LOG_FILE", os.path.join(os.path.dirname(__file__), 'api.log'))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Records waiting for the writer thread; further records are dropped rather than block the event loop
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Characters of large payloads (job descriptions) kept in the log, followed by their length and hash
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "200"))
+# Log names as-is instead of a short hash
+LOG_PII = os.getenv("LOG_PII", "false").lower() in ("1", "true", "yes")
+# Fraction of high-volume INFO lines kept per category or logger name, e.g. "request=0.1,cache=0,httpx=0.2"
+LOG_SAMPLE_RATES = {
+    category.strip(): float(rate)
+    for category, _, rate in (
+        entry.partition("=") for entry in os.getenv("LOG_SAMPLE_RATES", "").split(",") if entry.strip()
+    )
+}
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without blocking; counts what a full queue drops."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a LOG_SAMPLE_RATES fraction of the INFO records tagged with
+    extra={"sample": category}, or of all records of a logger listed by name.
+    Warnings and errors are always kept.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = LOG_SAMPLE_RATES.get(getattr(record, "sample", record.name), 1.0)
+        return rate >= 1 or record.levelno >= logging.WARNING or random.random() < rate
+
+
+if LOG_FILE == "-":
+    log_file_handler = logging.StreamHandler(sys.stderr)
+else:
+    log_file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+log_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+# Records are rendered to their message (and traceback) here; the writer adds time and level
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_queue_handler.addFilter(SamplingFilter())
+log_listener = logging.handlers.QueueListener(log_queue_handler.queue, log_file_handler)
+logging.basicConfig(level=LOG_LEVEL, handlers=[log_queue_handler])
+log_listener.start()
 logger = logging.getLogger(__name__)
 
+
+def stop_log_listener():
+    log_listener.stop()
+
+
+def restart_log_listener():
+    """
+    A forked worker (gunicorn --preload) inherits the queue but not the writer
+    thread; give it a fresh queue and writer of its own. Called from gunicorn's
+    post_fork hook, so other forked children (the extraction pool) get no writer.
+    """
+    global log_listener
+    log_queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    log_listener = logging.handlers.QueueListener(log_queue_handler.queue, log_file_handler)
+    log_listener.start()
+
+
+atexit.register(stop_log_listener)
+
+
+def log_payload(text: str) -> str:
+    """A large payload as logged: its first LOG_PAYLOAD_CHARS characters, length and hash."""
+    if len(text) <= LOG_PAYLOAD_CHARS:
+        return text.replace("\n", " ")
+    digest = hashlib.sha256(text.encode()).hexdigest()[:12]
+    return f"{text[:LOG_PAYLOAD_CHARS]}... [{len(text)} chars, sha256 {digest}]".replace("\n", " ")
+
+
+def log_pii(value: str) -> str:
+    """A name as logged: a stable short hash unless LOG_PII is set, so lines can still be correlated."""
+    if LOG_PII:
+        return value
+    return "#" + hashlib.sha256(value.encode()).hexdigest()[:10]
+
+
+# Per-request stage durations in seconds, collected for the structured request record
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add time spent in a stage to the current request's record. Concurrent stages add up."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def log_record(event: str, fields: dict, timings: Dict[str, float], failed: bool = False):
+    """Write one JSON record for a finished request or job. Failures are warnings; the rest are sampled as "request"."""
+    record = {
+        "event": event, **fields,
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()},
+    }
+    if failed:
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record), extra={"sample": "request"})
+
+# Web worker processes sharing this machine, as started by gunicorn.conf.py (or uvicorn --workers)
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY") or "1"))
+# Each web worker's share, the default size of its pdflatex and extraction pools
+WORKER_CPUS = max(1, available_cpus() // WEB_CONCURRENCY)
+
 app = FastAPI(title="Resume Generator API")
 
 # CORS middleware
@@ -47,7 +182,7 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-4-maverick:free")
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
 
 # Log configuration on startup
 logger.info(f"AI Provider: {AI_PROVIDER}")
@@ -61,53 +196,262 @@ OUTPUT_DIR = "generated_resumes"
 # Ensure output dir exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Initialize Groq client if using Groq provider
-groq_client = None
-if AI_PROVIDER == "groq":
-    if not GROQ_API_KEY:
-        logger.error("GROQ_API_KEY environment variable is not set! AI generation will fail.")
-    else:
-        try:
-            from groq import Groq
-            groq_client = Groq(api_key=GROQ_API_KEY)
-            logger.info("Groq client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Groq client: {e}")
+# Prometheus metrics (multi-process aware when PROMETHEUS_MULTIPROC_DIR is set)
+LLM_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+EXTRACTION_DURATION = Histogram(
+    "resume_extraction_seconds", "Time spent in extract_text_from_file",
+    ["file_type", "cache"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+SECTION_DURATION = Histogram(
+    "resume_section_generation_seconds", "Time to produce a section, including retries",
+    ["section", "provider"], buckets=LLM_BUCKETS
+)
+LLM_CALL_DURATION = Histogram(
+    "resume_llm_call_seconds", "Duration of individual provider calls",
+    ["section", "provider", "outcome"], buckets=LLM_BUCKETS
+)
+LATEX_PASS_DURATION = Histogram(
+    "resume_latex_pass_seconds", "Duration of a single pdflatex pass",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+LLM_RETRIES = Counter("resume_llm_retries_total", "Section generation retries", ["section"])
+VALIDATION_FAILURES = Counter("resume_section_validation_failures_total", "Sections that failed validation", ["section"])
+FALLBACKS_USED = Counter("resume_section_fallbacks_total", "Placeholder sections used after generation failed", ["section"])
+COALESCED_REQUESTS = Counter(
+    "resume_coalesced_requests_total", "Requests that attached to an identical generation already in flight"
+)
+LATEX_LINT_FAILURES = Counter(
+    "resume_section_latex_lint_failures_total", "Sections with unbalanced braces or environments", ["section"]
+)
+LLM_TOKENS = Counter("resume_llm_tokens_total", "Tokens reported by providers", ["provider", "type"])
+LLM_QUEUE_WAIT = Histogram(
+    "resume_llm_queue_wait_seconds", "Time LLM calls wait for the scheduler to admit them",
+    ["priority"], buckets=(0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+)
+LLM_QUEUE_DEPTH = Gauge("resume_llm_queue_depth", "LLM calls waiting for the scheduler", multiprocess_mode="livesum")
+GENERATIONS_IN_FLIGHT = Gauge(
+    "resume_generations_in_flight", "Resume generations currently running", multiprocess_mode="livesum"
+)
+
+# Section and provider of the LLM call in progress, for metric labels
+llm_call_context: ContextVar[Optional[dict]] = ContextVar("llm_call_context", default=None)
+
+
+# Receives (section, call id, text delta) as completions stream in; set to request streamed completions
+llm_token_listener: ContextVar[Optional[Callable[[str, int, str], None]]] = ContextVar(
+    "llm_token_listener", default=None
+)
+llm_stream_ids = itertools.count(1)
+
+
+def set_llm_call_section(section: str) -> dict:
+    context = {"section": section, "provider": "none"}
+    llm_call_context.set(context)
+    return context
+
+
+# LLM HTTP client configuration
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+# Maximum number of sections generated in parallel for a single resume
+SECTION_CONCURRENCY = max(1, int(os.getenv("SECTION_CONCURRENCY", "7")))
+
+if AI_PROVIDER == "groq" and not GROQ_API_KEY:
+    logger.error("GROQ_API_KEY environment variable is not set! AI generation will fail.")
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks: set = set()
+
+# Shared, connection-pooled HTTP client used for all provider calls
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use."""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=30.0
+            )
+        )
+        logger.info("Shared LLM HTTP client initialized")
+    return http_client
+
 
+@app.on_event("shutdown")
+async def close_http_client():
+    global http_client
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+    http_client = None
 
-def call_ai_api(system_prompt: str, user_prompt: str) -> str:
+
+class RateLimitError(Exception):
+    """The provider asked us to back off (HTTP 429/503)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse rate-limit reset values such as '12', '7.66s', '2m59.56s' or '1h2m3s' into seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to wait before calling the provider again, from standard or provider-specific headers."""
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        seconds = parse_duration(retry_after)
+        if seconds is None:
+            try:
+                seconds = (parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return max(0.0, seconds)
+
+    # Groq: durations until the request/token windows reset
+    resets = [
+        parse_duration(headers[name])
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if name in headers
+    ]
+    resets = [r for r in resets if r is not None]
+    if resets:
+        return max(resets)
+
+    # OpenRouter: epoch milliseconds at which the window resets
+    reset_at = headers.get("x-ratelimit-reset")
+    if reset_at and reset_at.isdigit():
+        return max(0.0, int(reset_at) / 1000 - time.time())
+    return None
+
+
+def check_chat_response(provider: str, response: httpx.Response):
+    """Raise for rate limits and HTTP errors, and note an exhausted rate-limit window."""
+    if response.status_code in (429, 503):
+        retry_after = parse_retry_after(response.headers)
+        raise RateLimitError(
+            f"{provider} rate limited (HTTP {response.status_code})",
+            retry_after if retry_after is not None else RATE_LIMIT_DEFAULT_BACKOFF
+        )
+    response.raise_for_status()
+
+    # Stop routing to a provider whose window is already exhausted
+    if response.headers.get("x-ratelimit-remaining-requests") == "0":
+        reset = parse_retry_after(response.headers)
+        if reset:
+            provider_states[provider].block_for(reset)
+
+
+def record_chat_usage(provider: str, usage: dict):
+    LLM_TOKENS.labels(provider, "prompt").inc(usage.get("prompt_tokens", 0))
+    LLM_TOKENS.labels(provider, "completion").inc(usage.get("completion_tokens", 0))
+    record_usage(
+        llm_calls=1,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0)
+    )
+
+
+async def post_chat_completion(provider: str, url: str, headers: dict, payload: dict) -> str:
+    """POST an OpenAI-compatible chat completion request and return the message content."""
+    if payload.get("stream"):
+        return await stream_chat_completion(provider, url, headers, payload)
+
+    response = await get_http_client().post(url, headers=headers, json=payload)
+    check_chat_response(provider, response)
+    data = response.json()
+
+    if "choices" not in data:
+        if "error" in data and "message" in data["error"]:
+            raise ValueError(f"API error: {data['error']['message']}")
+        raise ValueError("Invalid API response")
+
+    record_chat_usage(provider, data.get("usage") or {})
+    return data["choices"][0]["message"]["content"].strip()
+
+
+async def stream_chat_completion(provider: str, url: str, headers: dict, payload: dict) -> str:
     """
-    Call the configured AI provider (Groq or OpenRouter) and return the response.
+    Streamed variant of post_chat_completion: passes each content delta to the
+    current llm_token_listener and returns the whole message content.
     """
-    if AI_PROVIDER == "groq":
-        return call_groq_api(system_prompt, user_prompt)
-    else:
-        return call_openrouter_api(system_prompt, user_prompt)
+    listener = llm_token_listener.get()
+    section = (llm_call_context.get() or {}).get("section", "unknown")
+    call_id = next(llm_stream_ids)
+    parts = []
+    usage = {}
+    async with get_http_client().stream("POST", url, headers=headers, json=payload) as response:
+        if response.status_code >= 400:
+            await response.aread()
+        check_chat_response(provider, response)
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            chunk = line[len("data:"):].strip()
+            if chunk == "[DONE]":
+                break
+            data = json.loads(chunk)
+            if "error" in data:
+                raise ValueError(f"API error: {data['error'].get('message', data['error'])}")
+            # OpenRouter sends usage in the last chunk, Groq under x_groq
+            usage = data.get("usage") or (data.get("x_groq") or {}).get("usage") or usage
+            for choice in data.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    if listener:
+                        listener(section, call_id, delta)
 
+    record_chat_usage(provider, usage)
+    return "".join(parts).strip()
 
-def call_groq_api(system_prompt: str, user_prompt: str) -> str:
+
+async def call_groq_api(system_prompt: str, user_prompt: str, max_tokens: int = 1500) -> str:
     """Call Groq API and return the response content."""
-    if not groq_client:
-        raise ValueError("Groq client not initialized. Check GROQ_API_KEY.")
-    
-    logger.info(f"Calling Groq API with model: {GROQ_MODEL}")
-    
-    completion = groq_client.chat.completions.create(
-        model=GROQ_MODEL,
-        messages=[
+    if not GROQ_API_KEY:
+        raise ValueError("Groq API key not configured. Check GROQ_API_KEY.")
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {GROQ_API_KEY}"
+    }
+
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        temperature=0.3,
-        max_completion_tokens=1500,
-        top_p=1,
-        stream=False
-    )
-    
-    return completion.choices[0].message.content.strip()
+        "temperature": 0.3,
+        "max_completion_tokens": max_tokens,
+        "top_p": 1,
+        "stream": llm_token_listener.get() is not None
+    }
+
+    logger.info(f"Calling Groq API with model: {GROQ_MODEL}", extra={"sample": "llm_call"})
+    return await post_chat_completion("groq", GROQ_API_URL, headers, payload)
 
 
-def call_openrouter_api(system_prompt: str, user_prompt: str) -> str:
+async def call_openrouter_api(system_prompt: str, user_prompt: str, max_tokens: int = 1500) -> str:
     """Call OpenRouter API and return the response content."""
     headers = {
         "Content-Type": "application/json",
@@ -122,38 +466,457 @@ def call_openrouter_api(system_prompt: str, user_prompt: str) -> str:
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        "max_tokens": 1500,
+        "max_tokens": max_tokens,
         "temperature": 0.3,
-        "stream": False
+        "stream": llm_token_listener.get() is not None
     }
-    
-    logger.info(f"Calling OpenRouter API with model: {OPENROUTER_MODEL}")
-    response = requests.post(OPENROUTER_API_URL, headers=headers, json=payload)
-    response.raise_for_status()
-    data = response.json()
-    
-    if "choices" not in data:
-        if "error" in data and "message" in data["error"]:
-            raise ValueError(f"API error: {data['error']['message']}")
-        raise ValueError("Invalid API response")
-    
-    return data["choices"][0]["message"]["content"].strip()
 
+    logger.info(f"Calling OpenRouter API with model: {OPENROUTER_MODEL}", extra={"sample": "llm_call"})
+    return await post_chat_completion("openrouter", OPENROUTER_API_URL, headers, payload)
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    # Skip logging for health check endpoint to reduce noise
-    if request.url.path == "/health":
-        return await call_next(request)
-    
-    logger.info(f"New request: {request.method} {request.url}")
+
+# Provider routing: failover, hedged requests and circuit breaking
+PROVIDER_FAILOVER = os.getenv("PROVIDER_FAILOVER", "true").lower() in ("1", "true", "yes")
+# Send a duplicate request to the secondary provider if the primary has not answered by then (0 disables)
+HEDGE_AFTER_SECONDS = float(os.getenv("HEDGE_AFTER_SECONDS", "10"))
+CIRCUIT_FAILURE_THRESHOLD = max(1, int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", "5"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+
+
+class ProviderUnavailableError(Exception):
+    """No provider can currently take the request."""
+
+
+class ProviderState:
+    """Circuit breaker and rate-limit bookkeeping for one provider."""
+
+    def __init__(self, name: str, configured: bool):
+        self.name = name
+        self.configured = configured
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.blocked_until = 0.0
+
+    @property
+    def circuit(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= CIRCUIT_RESET_SECONDS:
+            return "half-open"
+        return "open"
+
+    def rate_limited_for(self) -> float:
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        logger.warning(f"Provider {self.name} rate limited for {seconds:.1f}s")
+
+    def available(self) -> bool:
+        if not self.configured or self.rate_limited_for() > 0:
+            return False
+        circuit = self.circuit
+        return circuit == "closed" or (circuit == "half-open" and not self.trial_in_flight)
+
+    def acquire(self) -> bool:
+        """
+        Claim a call slot. While half-open only the one trial call is admitted; the
+        check and the claim happen in one step, so concurrent callers cannot both pass.
+        """
+        circuit = self.circuit
+        if circuit == "open" or (circuit == "half-open" and self.trial_in_flight):
+            return False
+        if circuit == "half-open":
+            self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit for provider {self.name} closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.opened_at = time.monotonic()
+            logger.warning(f"Circuit for provider {self.name} opened after {self.failures} failures")
+
+    def release(self):
+        """Give back a half-open trial slot without a verdict (e.g. a cancelled hedge)."""
+        self.trial_in_flight = False
+
+    def snapshot(self) -> dict:
+        return {
+            "configured": self.configured,
+            "circuit": self.circuit,
+            "consecutive_failures": self.failures,
+            "rate_limited_for": round(self.rate_limited_for(), 1)
+        }
+
+
+PROVIDER_CALLS = {
+    "groq": call_groq_api,
+    "openrouter": call_openrouter_api
+}
+provider_states = {
+    "groq": ProviderState("groq", bool(GROQ_API_KEY)),
+    "openrouter": ProviderState("openrouter", bool(OPENROUTER_API_KEY))
+}
+
+
+def provider_order() -> List[str]:
+    """The configured provider first, then the failover provider if enabled."""
+    primary = AI_PROVIDER if AI_PROVIDER in PROVIDER_CALLS else "openrouter"
+    order = [primary]
+    if PROVIDER_FAILOVER:
+        order += [name for name in PROVIDER_CALLS if name != primary and provider_states[name].configured]
+    return order
+
+
+async def call_provider(name: str, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    state = provider_states[name]
+    context = llm_call_context.get() or {}
+    started = time.perf_counter()
+    if not state.acquire():
+        raise ProviderUnavailableError(f"Provider {name} circuit is open or its trial call is in flight")
     try:
-        response = await call_next(request)
-        logger.info(f"Completed request with status code {response.status_code}")
-        return response
-    except Exception as e:
-        logger.exception("Unhandled error in request:")
+        result = await PROVIDER_CALLS[name](system_prompt, user_prompt, max_tokens)
+    except asyncio.CancelledError:
+        state.release()
+        LLM_CALL_DURATION.labels(context.get("section", "unknown"), name, "cancelled").observe(time.perf_counter() - started)
+        raise
+    except RateLimitError as e:
+        state.release()
+        state.block_for(e.retry_after)
+        LLM_CALL_DURATION.labels(context.get("section", "unknown"), name, "rate_limited").observe(time.perf_counter() - started)
         raise
+    except Exception:
+        state.record_failure()
+        LLM_CALL_DURATION.labels(context.get("section", "unknown"), name, "error").observe(time.perf_counter() - started)
+        raise
+    state.record_success()
+    LLM_CALL_DURATION.labels(context.get("section", "unknown"), name, "success").observe(time.perf_counter() - started)
+    context["provider"] = name
+    return result
+
+
+async def available_providers() -> List[str]:
+    """
+    Providers that can take a request now, in preference order. If every provider
+    is only rate limited, wait (up to RATE_LIMIT_MAX_WAIT) for the first to reset.
+    """
+    order = provider_order()
+    candidates = [name for name in order if provider_states[name].available()]
+    if candidates:
+        return candidates
+
+    waits = [
+        provider_states[name].rate_limited_for() for name in order
+        if provider_states[name].configured and provider_states[name].circuit != "open"
+    ]
+    waits = [w for w in waits if w > 0]
+    if waits and min(waits) <= RATE_LIMIT_MAX_WAIT:
+        await asyncio.sleep(min(waits))
+        candidates = [name for name in order if provider_states[name].available()]
+    if not candidates:
+        raise ProviderUnavailableError("No AI provider available (not configured, circuit open or rate limited)")
+    return candidates
+
+
+async def route_ai_call(system_prompt: str, user_prompt: str, max_tokens: int = 1500) -> str:
+    """
+    Call the configured AI provider (Groq or OpenRouter) and return the response.
+    Fails over to the other provider on errors, and sends a hedged duplicate to it
+    when the first provider is slower than HEDGE_AFTER_SECONDS. The duplicate is
+    charged to the LLM budget and skipped when the budget cannot cover it.
+    """
+    candidates = await available_providers()
+    primary = candidates[0]
+    secondary = candidates[1] if len(candidates) > 1 else None
+
+    tasks = {asyncio.create_task(call_provider(primary, system_prompt, user_prompt, max_tokens)): primary}
+    if secondary is None:
+        return await next(iter(tasks))
+
+    last_error: Optional[BaseException] = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=HEDGE_AFTER_SECONDS if HEDGE_AFTER_SECONDS > 0 else None)
+        if done:
+            task = done.pop()
+            if task.exception() is None:
+                return task.result()
+            last_error = task.exception()
+            logger.warning(f"Provider {primary} failed ({last_error}), failing over to {secondary}")
+            tasks.clear()
+        else:
+            logger.info(f"Provider {primary} slower than {HEDGE_AFTER_SECONDS}s, hedging with {secondary}")
+
+        if not provider_states[secondary].available():
+            if last_error is not None:
+                raise last_error
+            return await next(iter(tasks))
+        if last_error is None and not llm_scheduler.try_charge(estimate_tokens(system_prompt, user_prompt) + max_tokens):
+            logger.info(f"LLM budget exhausted, not hedging with {secondary}")
+            return await next(iter(tasks))
+
+        tasks[asyncio.create_task(call_provider(secondary, system_prompt, user_prompt, max_tokens))] = secondary
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    # Both calls may finish in the same wakeup; the result returned is the one that answered
+                    (llm_call_context.get() or {})["provider"] = tasks[task]
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+# Outbound LLM scheduling: global request/token budget, fair per-client queues, priorities
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+# Defaults to the connection pool size so callers queue here, fairly, rather than in the pool
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", str(LLM_MAX_CONNECTIONS)))
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes")
+LLM_PRIORITIES = {"interactive": 0, "background": 1, "batch": 2}
+
+# Who the current LLM traffic is for, and how urgent it is
+llm_client: ContextVar[str] = ContextVar("llm_client", default="anonymous")
+llm_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+
+class LLMScheduler:
+    """
+    Admits outbound LLM calls against a global budget of requests and tokens per
+    minute (token buckets) and a cap on calls in flight. Waiting calls are served
+    strictly by priority, and round-robin across clients within a priority, so one
+    client with many queued calls cannot starve the others. Each web worker runs
+    its own scheduler with its share of the budget, so fairness holds per worker.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_in_flight: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+        # A worker's share of the budget can be under one request a minute; the bucket
+        # must still hold a whole request, which then refills at the slower rate
+        self.request_capacity = max(1.0, requests_per_minute) if requests_per_minute else 0.0
+        self.request_budget = self.request_capacity
+        self.token_budget = float(tokens_per_minute)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        # priority -> client -> waiting (future, token cost); client order is the round-robin order
+        self.queues: Dict[int, "OrderedDict[str, Deque[Tuple[asyncio.Future, int]]]"] = {
+            level: OrderedDict() for level in LLM_PRIORITIES.values()
+        }
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def refill(self):
+        now = time.monotonic()
+        elapsed, self.refilled_at = now - self.refilled_at, now
+        if self.requests_per_minute:
+            self.request_budget = min(self.request_capacity,
+                                      self.request_budget + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self.token_budget = min(self.tokens_per_minute,
+                                    self.token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def budget_wait(self, cost: int) -> float:
+        """Seconds until the budget covers one request of `cost` tokens (0 if it already does)."""
+        wait = 0.0
+        if self.requests_per_minute and self.request_budget < 1:
+            wait = (1 - self.request_budget) * 60 / self.requests_per_minute
+        if self.tokens_per_minute and self.token_budget < cost:
+            wait = max(wait, (cost - self.token_budget) * 60 / self.tokens_per_minute)
+        return wait
+
+    def dispatch(self):
+        """Grant queued calls while capacity and budget allow."""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        self.refill()
+        while not self.max_in_flight or self.in_flight < self.max_in_flight:
+            head = next(((level, clients) for level, clients in sorted(self.queues.items()) if clients), None)
+            if head is None:
+                return
+            level, clients = head
+            client, waiters = next(iter(clients.items()))
+            future, cost = waiters[0]
+            if not future.done():
+                wait = self.budget_wait(cost)
+                if wait > 0:
+                    self.timer = asyncio.get_running_loop().call_later(wait, self.dispatch)
+                    return
+                if self.requests_per_minute:
+                    self.request_budget -= 1
+                if self.tokens_per_minute:
+                    self.token_budget -= cost
+                self.in_flight += 1
+                future.set_result(None)
+            waiters.popleft()
+            del clients[client]
+            if waiters:
+                clients[client] = waiters  # back of the round-robin
+
+    async def acquire(self, cost: int, client: str, priority: str):
+        level = LLM_PRIORITIES.get(priority, 0)
+        # A single call larger than the whole budget could never be admitted
+        if self.tokens_per_minute:
+            cost = min(cost, self.tokens_per_minute)
+        future = asyncio.get_running_loop().create_future()
+        self.queues[level].setdefault(client, deque()).append((future, cost))
+        LLM_QUEUE_DEPTH.inc()
+        queued_at = time.perf_counter()
+        try:
+            self.dispatch()
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self.discard(level, client, future)
+            raise
+        finally:
+            LLM_QUEUE_DEPTH.dec()
+            LLM_QUEUE_WAIT.labels(priority).observe(time.perf_counter() - queued_at)
+            record_stage("llm_queue", time.perf_counter() - queued_at)
+
+    def try_charge(self, cost: int) -> bool:
+        """
+        Charge the budget for an extra call (a hedged duplicate) if it covers one
+        right now and nobody is queued for it. Returns False instead of waiting.
+        """
+        self.refill()
+        if self.tokens_per_minute:
+            cost = min(cost, self.tokens_per_minute)
+        if any(self.queues.values()) or self.budget_wait(cost) > 0:
+            return False
+        if self.requests_per_minute:
+            self.request_budget -= 1
+        if self.tokens_per_minute:
+            self.token_budget -= cost
+        return True
+
+    def discard(self, level: int, client: str, future: asyncio.Future):
+        waiters = self.queues[level].get(client)
+        if waiters is None:
+            return
+        for entry in waiters:
+            if entry[0] is future:
+                waiters.remove(entry)
+                break
+        if not waiters:
+            del self.queues[level][client]
+        self.dispatch()
+
+    def release(self):
+        self.in_flight -= 1
+        self.dispatch()
+
+    def snapshot(self) -> dict:
+        self.refill()
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": {
+                priority: sum(len(waiters) for waiters in self.queues[level].values())
+                for priority, level in LLM_PRIORITIES.items()
+            },
+            "queued_clients": len({client for clients in self.queues.values() for client in clients}),
+            "requests_budget": round(self.request_budget, 1) if self.requests_per_minute else None,
+            "tokens_budget": round(self.token_budget) if self.tokens_per_minute else None,
+        }
+
+
+# The budgets are for the whole deployment; each web worker schedules an equal share
+llm_scheduler = LLMScheduler(
+    LLM_REQUESTS_PER_MINUTE / WEB_CONCURRENCY, LLM_TOKENS_PER_MINUTE / WEB_CONCURRENCY, LLM_MAX_IN_FLIGHT
+)
+
+
+async def call_ai_api(system_prompt: str, user_prompt: str, max_tokens: int = 1500) -> str:
+    """
+    Call the AI provider once the scheduler admits the call. The call is charged its
+    estimated prompt tokens plus max_tokens, which is how providers count it against
+    their per-minute limits.
+    """
+    cost = estimate_tokens(system_prompt, user_prompt) + max_tokens
+    await llm_scheduler.acquire(cost, llm_client.get(), llm_priority.get())
+    try:
+        return await route_ai_call(system_prompt, user_prompt, max_tokens)
+    finally:
+        llm_scheduler.release()
+
+
+def client_key(scope) -> str:
+    """Fair-queuing key: the caller's X-API-Key if it sends one, otherwise its IP."""
+    headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope.get("headers", [])}
+    if headers.get("x-api-key"):
+        return "key:" + hashlib.sha256(headers["x-api-key"].encode()).hexdigest()[:16]
+    if TRUST_PROXY_HEADERS and headers.get("x-forwarded-for"):
+        return "ip:" + headers["x-forwarded-for"].split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RequestLoggingMiddleware:
+    """
+    Writes one structured record per request: method, path, status, duration,
+    client and the stage timings collected with record_stage. Plain ASGI rather
+    than @app.middleware("http"), which hides client disconnects from the
+    endpoints (see wait_for_client).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Skip logging for health check and metrics endpoints to reduce noise
+        if scope["type"] != "http" or scope["path"] in ("/health", "/metrics"):
+            return await self.app(scope, receive, send)
+
+        client = client_key(scope)
+        llm_client.set(client)
+        timings: Dict[str, float] = {}
+        request_timings.set(timings)
+        started = time.perf_counter()
+        status = None
+
+        async def send_logged(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings["first_byte"] = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_logged)
+        except Exception:
+            logger.exception("Unhandled error in request:")
+            status = status or 500
+            raise
+        finally:
+            log_record("request", {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "client": client if client.startswith("key:") else log_pii(client),
+            }, timings, failed=status is None or status >= 500)
+
+
+app.add_middleware(RequestLoggingMiddleware)
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
@@ -171,66 +934,596 @@ async def validation_exception_handler(request, exc):
         content={"detail": str(exc)}
     )
 
-async def extract_text_from_file(file_path: str) -> str:
-    ext = os.path.splitext(file_path)[1].lower()
-    try:
-        if ext == ".pdf":
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                return "\n".join([p.extract_text() or "" for p in reader.pages])
-        elif ext == ".docx":
-            doc = Document(file_path)
-            return "\n".join([p.text for p in doc.paragraphs])
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file format: {ext}")
-    except Exception as e:
-        logger.exception("Error extracting text from file:")
-        raise HTTPException(status_code=500, detail=f"File extraction error: {str(e)}")
+# Extraction cache configuration
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "")
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
 
-# Define resume sections and their requirements
-RESUME_SECTIONS = [
-    {
-        "name": "Professional Summary",
-        "required": True,
-        "validation": lambda x: "\\section{Professional Summary}" in x and len(x.split('\n')) >= 3
-    },
-    {
-        "name": "Technical Skills",
-        "required": True,
-        "validation": lambda x: "\\subsection{Technical Skills}" in x
-    },
-    {
-        "name": "Education",
-        "required": True,
-        "validation": lambda x: "\\section{Education}" in x
-    },
-    {
-        "name": "Certifications",
-        "required": False,
-        "validation": lambda x: "\\section{Certifications}" in x
-    },
-    {
-        "name": "Experience",
-        "required": True,
-        "validation": lambda x: "\\section{Experience}" in x and "\\begin{itemize}" in x
-    },
-    {
-        "name": "Projects",
-        "required": False,
-        "validation": lambda x: "\\section{Projects}" in x
-    },
-    {
-        "name": "Languages and Personal Info",
-        "required": False,
-        "validation": lambda x: "\\section{Languages and Personal Info}" in x
-    }
-]
 
-async def generate_section(section_name: str, job_description: str, resume_content: str) -> str:
-    """Generate a single section of the resume using the configured AI provider."""
-    logger.info(f"Generating section: {section_name}")
-    
-    system = """
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted resume text. An in-memory LRU tier is
+    backed by an optional on-disk tier evicted oldest-first once it exceeds
+    `max_disk_bytes`.
+    """
+
+    def __init__(self, max_entries: int, disk_dir: str = "", max_disk_bytes: int = 0):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return self.entries[key]
+
+        if self.disk_dir:
+            text = await asyncio.to_thread(self.read_disk, key)
+            if text is not None:
+                self.stats["disk_hits"] += 1
+                self.remember(key, text)
+                return text
+
+        self.stats["misses"] += 1
+        return None
+
+    def read_disk(self, key: str) -> Optional[str]:
+        path = self.disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # keep recently used files out of eviction
+            return text
+        except FileNotFoundError:
+            return None
+
+    def remember(self, key: str, text: str):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = text
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def put(self, key: str, text: str):
+        self.remember(key, text)
+        if not self.disk_dir:
+            return
+        try:
+            await asyncio.to_thread(self.write_disk, key, text)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache entry: {e}")
+
+    def write_disk(self, key: str, text: str):
+        with open(self.disk_path(key), "w", encoding="utf-8") as f:
+            f.write(text)
+        self.evict_disk()
+
+    def evict_disk(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith(".txt"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        files.sort()
+        while total > self.max_disk_bytes and files:
+            _, size, path = files.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "memory_entries": len(self.entries), "disk_enabled": bool(self.disk_dir)}
+
+
+extraction_cache = ExtractionCache(EXTRACTION_CACHE_SIZE, EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES)
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Upload and extraction worker configuration
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+EXTRACTION_WORKERS = max(1, int(os.getenv("EXTRACTION_WORKERS", str(min(4, WORKER_CPUS)))))
+# PDFs with more pages than this are split across extraction workers
+PDF_PAGES_PER_TASK = max(1, int(os.getenv("PDF_PAGES_PER_TASK", "8")))
+
+extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Return the process pool used for CPU-heavy parsing, creating it on first use."""
+    global extraction_pool
+    if extraction_pool is None:
+        extraction_pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+    return extraction_pool
+
+
+@app.on_event("shutdown")
+async def stop_extraction_pool():
+    global extraction_pool
+    if extraction_pool is not None:
+        extraction_pool.shutdown(wait=False, cancel_futures=True)
+        extraction_pool = None
+
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+
+def check_resume_extension(filename: str) -> str:
+    """Return the lower-cased extension of a resume file, rejecting unsupported ones with a 400."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in RESUME_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file format: {ext}")
+    return ext
+
+
+async def save_upload(upload: UploadFile) -> str:
+    """
+    Stream an uploaded file to a temporary file in chunks, enforcing
+    UPLOAD_MAX_BYTES. Returns the temporary file path; the caller removes it.
+    Unsupported file types are rejected before anything is read.
+    """
+    suffix = check_resume_extension(upload.filename or "")
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    size = 0
+    started = time.perf_counter()
+    try:
+        with tmp:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Resume file exceeds the {UPLOAD_MAX_BYTES // (1024 * 1024)} MB limit"
+                    )
+                await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    record_stage("upload", time.perf_counter() - started)
+    return tmp.name
+
+
+# PyPDF2 and python-docx are imported by the extraction workers that use them, keeping
+# them out of the web workers' startup time and memory
+def open_pdf_pages(file_path: str, max_pages: int) -> Tuple[int, Optional[str]]:
+    """
+    Count the pages of a PDF and, if there are at most max_pages, extract them in
+    the same pass. Runs in an extraction worker; longer PDFs return no text.
+    """
+    import PyPDF2
+
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        if page_count > max_pages:
+            return page_count, None
+        return page_count, "\n".join([page.extract_text() or "" for page in reader.pages])
+
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) of a PDF. Runs in an extraction worker."""
+    import PyPDF2
+
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return "\n".join([reader.pages[i].extract_text() or "" for i in range(start, stop)])
+
+
+def extract_docx_text(file_path: str) -> str:
+    """Extract paragraph text from a DOCX file. Runs in an extraction worker."""
+    from docx import Document
+
+    doc = Document(file_path)
+    return "\n".join([p.text for p in doc.paragraphs])
+
+
+async def extract_pdf_text(file_path: str) -> str:
+    loop = asyncio.get_running_loop()
+    pool = get_extraction_pool()
+    page_count, text = await loop.run_in_executor(pool, open_pdf_pages, file_path, PDF_PAGES_PER_TASK)
+    if text is not None:
+        return text
+    ranges = [
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(pool, extract_pdf_pages, file_path, start, stop)
+        for start, stop in ranges
+    ])
+    return "\n".join(chunks)
+
+
+async def extract_text_from_file(file_path: str) -> str:
+    ext = check_resume_extension(file_path)
+
+    started = time.perf_counter()
+    try:
+        content_hash = await asyncio.to_thread(file_sha256, file_path)
+        cache_key = f"{content_hash}{ext.replace('.', '_')}"
+        cached = await extraction_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Extraction cache hit", extra={"sample": "cache"})
+            EXTRACTION_DURATION.labels(ext[1:], "hit").observe(time.perf_counter() - started)
+            record_stage("extraction", time.perf_counter() - started)
+            return cached
+
+        if ext == ".pdf":
+            text = await extract_pdf_text(file_path)
+        else:
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(get_extraction_pool(), extract_docx_text, file_path)
+
+        await extraction_cache.put(cache_key, text)
+        EXTRACTION_DURATION.labels(ext[1:], "miss").observe(time.perf_counter() - started)
+        record_stage("extraction", time.perf_counter() - started)
+        return text
+    except Exception as e:
+        logger.exception("Error extracting text from file:")
+        raise HTTPException(status_code=500, detail=f"File extraction error: {str(e)}")
+
+# Define resume sections and their requirements
+RESUME_SECTIONS = [
+    {
+        "name": "Professional Summary",
+        "required": True,
+        "validation": lambda x: "\\section{Professional Summary}" in x and len(x.split('\n')) >= 3
+    },
+    {
+        "name": "Technical Skills",
+        "required": True,
+        "validation": lambda x: "\\subsection{Technical Skills}" in x
+    },
+    {
+        "name": "Education",
+        "required": True,
+        "validation": lambda x: "\\section{Education}" in x
+    },
+    {
+        "name": "Certifications",
+        "required": False,
+        "validation": lambda x: "\\section{Certifications}" in x
+    },
+    {
+        "name": "Experience",
+        "required": True,
+        "validation": lambda x: "\\section{Experience}" in x and "\\begin{itemize}" in x
+    },
+    {
+        "name": "Projects",
+        "required": False,
+        "validation": lambda x: "\\section{Projects}" in x
+    },
+    {
+        "name": "Languages and Personal Info",
+        "required": False,
+        "validation": lambda x: "\\section{Languages and Personal Info}" in x
+    }
+]
+
+# Section cache configuration
+# Bump PROMPT_VERSION whenever prompt semantics change so cached sections are not reused
+PROMPT_VERSION = "1"
+SECTION_CACHE_BACKEND = os.getenv("SECTION_CACHE_BACKEND", "memory").lower()
+SECTION_CACHE_TTL = int(os.getenv("SECTION_CACHE_TTL", "86400"))
+SECTION_CACHE_MAX_ENTRIES = int(os.getenv("SECTION_CACHE_MAX_ENTRIES", "1000"))
+SECTION_CACHE_PATH = os.getenv("SECTION_CACHE_PATH", "section_cache.sqlite3")
+
+
+class MemorySectionCacheBackend:
+    """In-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.entries[key] = (time.time() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self.entries)
+
+
+class SqliteSectionCacheBackend:
+    """
+    Local SQLite store, shared across workers and kept across restarts. Each
+    process opens its own connection on first use, since a connection must
+    not be carried across fork.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn: Optional[sqlite3.Connection] = None
+        self.pid = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Return this process's connection. Call with the lock held."""
+        if self.conn is None or self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.pid = os.getpid()
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.conn.commit()
+        return self.conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM sections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM sections WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE sections SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: int):
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO sections (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            conn.execute("DELETE FROM sections WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM sections WHERE key NOT IN "
+                "(SELECT key FROM sections ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def size(self) -> int:
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+
+class SectionCache:
+    """Cache of validated section outputs in front of a pluggable backend."""
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(section_name: str, model: str, system_prompt: str, user_prompt: str) -> str:
+        # The rendered prompts already embed the job description and resume text
+        digest = hashlib.sha256()
+        for part in (PROMPT_VERSION, model, section_name, system_prompt, user_prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        if self.backend is None:
+            return None
+        value = await asyncio.to_thread(self.backend.get, key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str):
+        if self.backend is None:
+            return
+        try:
+            await asyncio.to_thread(self.backend.set, key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not store section in cache: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "backend": SECTION_CACHE_BACKEND,
+            "entries": self.backend.size() if self.backend is not None else 0
+        }
+
+
+def create_section_cache() -> SectionCache:
+    if SECTION_CACHE_BACKEND == "sqlite":
+        backend = SqliteSectionCacheBackend(SECTION_CACHE_PATH, SECTION_CACHE_MAX_ENTRIES)
+    elif SECTION_CACHE_BACKEND == "memory":
+        backend = MemorySectionCacheBackend(SECTION_CACHE_MAX_ENTRIES)
+    else:
+        backend = None
+    return SectionCache(backend, SECTION_CACHE_TTL)
+
+
+section_cache = create_section_cache()
+
+
+PROVIDER_MODELS = {"groq": GROQ_MODEL, "openrouter": OPENROUTER_MODEL}
+
+
+def active_model() -> str:
+    return PROVIDER_MODELS.get(AI_PROVIDER, OPENROUTER_MODEL)
+
+
+def answering_model(context: dict) -> str:
+    """The model of the provider that answered the call recorded in `context`; failover and hedges change it."""
+    return PROVIDER_MODELS.get(context["provider"], active_model())
+
+
+# Profile extraction: condense the resume and job description once per resume
+PROFILE_EXTRACTION = os.getenv("PROFILE_EXTRACTION", "true").lower() in ("1", "true", "yes")
+PROFILE_MAX_TOKENS = int(os.getenv("PROFILE_MAX_TOKENS", "2500"))
+
+PROFILE_SYSTEM_PROMPT = """
+You condense a resume and a job description into a compact JSON profile for a resume writer.
+
+- Output ONLY a JSON object, no explanations or code fences.
+- Keep facts exactly as written in the resume (names, titles, dates, numbers). Never invent data.
+- Use short phrases, not sentences. Omit empty fields.
+"""
+
+PROFILE_SCHEMA = """{
+  "job": {
+    "job_title": "title from the job description",
+    "keywords": ["primary keywords, most important first"],
+    "tools": ["tools and technologies named in the job description"],
+    "responsibilities": ["key responsibilities"],
+    "soft_skills": ["soft skills asked for"]
+  },
+  "candidate": {
+    "headline": "current or most recent title",
+    "years_experience": "total years of experience if stated",
+    "roles": [{"title": "", "company": "", "start": "", "end": "", "highlights": ["achievements with metrics and tools"]}],
+    "skills": ["technical skills"],
+    "tools": ["tools and technologies"],
+    "achievements": ["notable achievements"],
+    "education": [{"degree": "", "institution": "", "year": "", "gpa": "", "details": ["coursework, honors"]}],
+    "certifications": [""],
+    "projects": [{"name": "", "tools": [""], "highlights": [""]}],
+    "languages": [""],
+    "personal_info": ["driving license and similar; no date of birth, marital status or religion"]
+  }
+}"""
+
+# Profile fields each section prompt needs: (job fields, candidate fields)
+SECTION_PROFILE_FIELDS = {
+    "Professional Summary": (
+        ["job_title", "keywords", "responsibilities", "soft_skills"],
+        ["headline", "years_experience", "roles", "skills", "achievements"]
+    ),
+    "Technical Skills": (["keywords", "tools"], ["skills", "tools"]),
+    "Education": (["job_title", "keywords"], ["education"]),
+    "Certifications": (["keywords"], ["certifications"]),
+    "Experience": (["job_title", "keywords", "tools", "responsibilities", "soft_skills"], ["roles"]),
+    "Projects": (["keywords", "tools"], ["projects"]),
+    "Languages and Personal Info": ([], ["languages", "personal_info"])
+}
+
+# Per-request LLM token usage, shared by every call made for the same resume
+llm_usage: ContextVar[Optional[dict]] = ContextVar("llm_usage", default=None)
+
+
+def record_usage(**counts):
+    usage = llm_usage.get()
+    if usage is not None:
+        for key, value in counts.items():
+            usage[key] = usage.get(key, 0) + value
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (about 4 characters per token for English text)."""
+    return sum(len(text) for text in texts) // 4
+
+
+def parse_json_object(content: str) -> dict:
+    """Parse the first JSON object in a model response, tolerating code fences."""
+    if "```" in content:
+        blocks = re.findall(r"```(?:json)?(.*?)```", content, re.DOTALL)
+        content = blocks[0].strip() if blocks else content
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in response")
+    data = json.loads(content[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    return data
+
+
+def build_profile_prompt(job_description: str, resume_content: str) -> str:
+    return f"""
+    Build the profile using exactly this JSON structure:
+    {PROFILE_SCHEMA}
+
+    Job Description:
+    {job_description}
+
+    Resume Content:
+    {resume_content}
+    """
+
+
+async def extract_profile(job_description: str, resume_content: str, use_cache: bool = True) -> Optional[dict]:
+    """
+    Condense the resume and job description into a structured profile with one
+    LLM call. Returns None if the model does not produce a usable profile.
+    """
+    prompt = build_profile_prompt(job_description, resume_content)
+    cache_key = SectionCache.make_key("__profile__", active_model(), PROFILE_SYSTEM_PROMPT, prompt)
+    if use_cache:
+        cached = await section_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Profile cache hit", extra={"sample": "cache"})
+            return json.loads(cached)
+
+    context = set_llm_call_section("profile")
+    try:
+        content = await call_ai_api(PROFILE_SYSTEM_PROMPT, prompt, max_tokens=PROFILE_MAX_TOKENS)
+        profile = parse_json_object(content)
+        if not isinstance(profile.get("job"), dict) or not isinstance(profile.get("candidate"), dict):
+            raise ValueError("Profile is missing job or candidate data")
+    except Exception as e:
+        logger.warning(f"Profile extraction failed, using full-text prompts: {e}")
+        return None
+
+    cache_key = SectionCache.make_key("__profile__", answering_model(context), PROFILE_SYSTEM_PROMPT, prompt)
+    await section_cache.set(cache_key, json.dumps(profile))
+    return profile
+
+
+def profile_context(section_name: str, profile: dict) -> Tuple[str, str]:
+    """Return the (job, resume) context for a section, reduced to the profile fields it needs."""
+    job_fields, candidate_fields = SECTION_PROFILE_FIELDS.get(section_name, ([], []))
+    job = {k: profile["job"][k] for k in job_fields if profile["job"].get(k)}
+    candidate = {k: profile["candidate"][k] for k in candidate_fields if profile["candidate"].get(k)}
+    return (
+        json.dumps(job, ensure_ascii=False, separators=(",", ":")),
+        json.dumps(candidate, ensure_ascii=False, separators=(",", ":"))
+    )
+
+
+SECTION_SYSTEM_PROMPT = """
     You are a LaTeX resume generator that only outputs LaTeX-formatted content for a specific resume section.
 
     - Output must be STRICTLY LaTeX code (no text, explanations, or placeholders).
@@ -239,7 +1532,10 @@ async def generate_section(section_name: str, job_description: str, resume_conte
     - If GPA is not included in the input, remove it entirely from the Education section.
     - Embed soft skills inside Experience or Summary — do NOT list soft skills in a separate section.
     """
-    
+
+
+def section_instructions(section_name: str) -> str:
+    """Return the generation instructions for a resume section, without any input context."""
     section_prompts = {
         "Professional Summary": f"""
         Generate ONLY the Professional Summary section for a resume in LaTeX format.
@@ -249,11 +1545,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - Use 7+ job description primary keywords, 2–3 soft skills in context
         - Example: "[JD Job Title] with 3+ years in [Keyword 1], [Keyword 2], delivering [Achievement]. Strong in [Soft Skill 1] and [Soft Skill 2]."
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Technical Skills": f"""
@@ -264,11 +1555,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - Use "Familiar with" for skills that appear less prominently in the resume
         - Format as a clean, readable list or paragraph
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Education": f"""
@@ -280,11 +1566,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
           \\textit{{University Name}} \\hfill \\textit{{GPA: X.X}} (remove if not provided)
         - Include bullets for relevant coursework, notable projects or honors if available
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Certifications": f"""
@@ -294,11 +1575,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - List all certifications with bullet points or commas
         - If no certifications are found in the resume, output a minimal section with placeholder text
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Experience": f"""
@@ -315,11 +1591,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - Incorporate relevant keywords from the job description
         - Emphasize achievements and quantifiable results
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Projects": f"""
@@ -331,11 +1602,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - Include 1–2 bullets per project highlighting value or technologies used
         - If no projects are found in the resume, output a minimal section with placeholder text
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """,
         
         "Languages and Personal Info": f"""
@@ -346,11 +1612,6 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         - Do NOT include date of birth, marital status, or religion
         - If no relevant information is found, output a minimal section with placeholder text
         
-        Job Description:
-        {job_description}
-        
-        Resume Content:
-        {resume_content}
         """
     }
     
@@ -358,7 +1619,72 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         logger.error(f"Unknown section: {section_name}")
         raise ValueError(f"Unknown section: {section_name}")
     
-    prompt = section_prompts[section_name]
+    return section_prompts[section_name]
+
+
+def build_prompt_context(job_description: str, resume_content: str) -> str:
+    return f"""Job Description:
+        {job_description}
+        
+        Resume Content:
+        {resume_content}
+        """
+
+
+def build_section_prompts(section_name: str, job_description: str, resume_content: str) -> Tuple[str, str]:
+    """Return the (system, user) prompts for a resume section."""
+    return SECTION_SYSTEM_PROMPT, section_instructions(section_name) + build_prompt_context(job_description, resume_content)
+
+
+def section_request(section_name: str, job_description: str, resume_content: str,
+                    profile: Optional[dict] = None) -> Tuple[str, str, str]:
+    """Return the (system, user) prompts and the cache key for generating one section."""
+    if profile is not None:
+        job_description, resume_content = profile_context(section_name, profile)
+    system, prompt = build_section_prompts(section_name, job_description, resume_content)
+    return system, prompt, SectionCache.make_key(section_name, active_model(), system, prompt)
+
+
+def clean_section_output(content: str) -> str:
+    """Extract LaTeX content if wrapped in code blocks."""
+    if "```" in content:
+        blocks = re.findall(r"```(?:latex)?(.*?)```", content, re.DOTALL)
+        content = blocks[0].strip() if blocks else content
+    return content.strip()
+
+
+def section_is_valid(section_name: str, content: str) -> bool:
+    section_info = next((s for s in RESUME_SECTIONS if s["name"] == section_name), None)
+    return not section_info or section_info["validation"](content)
+
+
+async def generate_section(section_name: str, job_description: str, resume_content: str,
+                           use_cache: bool = True, profile: Optional[dict] = None) -> str:
+    """
+    Generate a single section of the resume using the configured AI provider.
+    With use_cache=False the cache lookup is skipped and the fresh result replaces any cached one.
+    When a condensed `profile` is given, the prompt carries only the profile fields
+    the section needs instead of the full job description and resume.
+    """
+    logger.info(f"Generating section: {section_name}")
+    context = set_llm_call_section(section_name)
+    started = time.perf_counter()
+    try:
+        return await generate_section_with_retries(section_name, job_description, resume_content,
+                                                   use_cache, profile, context)
+    finally:
+        SECTION_DURATION.labels(section_name, context["provider"]).observe(time.perf_counter() - started)
+
+
+async def generate_section_with_retries(section_name: str, job_description: str, resume_content: str,
+                                        use_cache: bool, profile: Optional[dict], context: dict) -> str:
+    system, prompt, cache_key = section_request(section_name, job_description, resume_content, profile)
+    if use_cache:
+        cached = await section_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Section cache hit: {section_name}", extra={"sample": "cache"})
+            context["provider"] = "cache"
+            return cached
     
     # Add retry mechanism
     max_retries = 3
@@ -368,38 +1694,152 @@ async def generate_section(section_name: str, job_description: str, resume_conte
         try:
             logger.info(f"Sending request for section {section_name} to {AI_PROVIDER} API (attempt {attempt+1}/{max_retries})")
             
-            content = call_ai_api(system, prompt)
+            content = await call_ai_api(system, prompt)
             
             logger.info(f"API Response received for section {section_name}")
 
-            # Extract LaTeX content if wrapped in code blocks
-            if "```" in content:
-                blocks = re.findall(r"```(?:latex)?(.*?)```", content, re.DOTALL)
-                content = blocks[0].strip() if blocks else content
+            content = clean_section_output(content)
 
             # Basic validation
-            section_info = next((s for s in RESUME_SECTIONS if s["name"] == section_name), None)
-            if section_info and not section_info["validation"](content):
+            if not section_is_valid(section_name, content):
                 logger.warning(f"Section {section_name} failed validation")
+                VALIDATION_FAILURES.labels(section_name).inc()
                 if attempt < max_retries - 1:
+                    LLM_RETRIES.labels(section_name).inc()
                     continue
                 else:
+                    FALLBACKS_USED.labels(section_name).inc()
+                    context["provider"] = "fallback"
                     return generate_fallback_section(section_name)
 
+            # Structural problems are re-requested while retries remain, otherwise repaired in place
+            content, lint_issues = lint_latex_section(content)
+            if lint_issues:
+                logger.warning(f"Section {section_name} has malformed LaTeX: {'; '.join(lint_issues)}")
+                LATEX_LINT_FAILURES.labels(section_name).inc()
+                if LATEX_LINT_REGENERATE and attempt < max_retries - 1:
+                    LLM_RETRIES.labels(section_name).inc()
+                    continue
+
             logger.info(f"Successfully generated section: {section_name}")
+            await section_cache.set(SectionCache.make_key(section_name, answering_model(context), system, prompt), content)
             return content
             
         except Exception as e:
             logger.warning(f"API attempt {attempt+1} for section {section_name} failed: {str(e)}")
             if attempt < max_retries - 1:
                 logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                LLM_RETRIES.labels(section_name).inc()
+                await asyncio.sleep(retry_delay)
                 retry_delay *= 2  # Exponential backoff
                 continue
             else:
                 logger.warning(f"Using fallback for section {section_name}")
+                FALLBACKS_USED.labels(section_name).inc()
+                context["provider"] = "fallback"
                 return generate_fallback_section(section_name)
 
+# Multi-section mode: ask for every section in one completion
+GENERATION_MODE = os.getenv("GENERATION_MODE", "sections").lower()
+GENERATION_MODES = ("sections", "single")
+MULTI_SECTION_MAX_TOKENS = int(os.getenv("MULTI_SECTION_MAX_TOKENS", "6000"))
+SECTION_DELIMITER_PATTERN = re.compile(r"^\s*%%% SECTION: (.+?) %%%\s*$", re.MULTILINE)
+
+MULTI_SECTION_SYSTEM_PROMPT = """
+    You are a LaTeX resume generator that only outputs LaTeX-formatted content for the requested resume sections.
+
+    - Output must be STRICTLY LaTeX code (no text, explanations, or placeholders) apart from the section delimiter lines.
+    - Start every section with a delimiter line of the form: %%% SECTION: <Section Name> %%%
+    - Output the sections in the requested order, each exactly once.
+    - Maintain consistent bullet formatting: action verb + metric + tool/keyword.
+    - If GPA is not included in the input, remove it entirely from the Education section.
+    - Embed soft skills inside Experience or Summary — do NOT list soft skills in a separate section.
+    """
+
+
+def check_generation_mode(generation_mode: Optional[str]):
+    """Reject unknown per-request generation modes with a 400."""
+    if generation_mode and generation_mode.lower() not in GENERATION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown generation_mode '{generation_mode}', expected one of: {', '.join(GENERATION_MODES)}"
+        )
+
+
+def build_multi_section_prompt(section_names: List[str], job_description: str, resume_content: str,
+                               profile: Optional[dict] = None) -> str:
+    if profile is not None:
+        job_description = json.dumps(profile["job"], ensure_ascii=False, separators=(",", ":"))
+        resume_content = json.dumps(profile["candidate"], ensure_ascii=False, separators=(",", ":"))
+    parts = [f"""
+        Generate the following resume sections in LaTeX format, in this order: {", ".join(section_names)}.
+        Precede each one with its delimiter line, e.g. %%% SECTION: {section_names[0]} %%%
+        """]
+    for section_name in section_names:
+        parts.append(f"""
+        ### {section_name}
+        {section_instructions(section_name)}""")
+    parts.append(build_prompt_context(job_description, resume_content))
+    return "".join(parts)
+
+
+def split_multi_section_output(content: str) -> Dict[str, str]:
+    """Split a delimited multi-section completion into {section name: LaTeX}."""
+    # Drop code fences wrapped around the whole completion
+    content = re.sub(r"^\s*```(?:latex)?\s*$", "", content, flags=re.MULTILINE)
+    matches = list(SECTION_DELIMITER_PATTERN.finditer(content))
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        sections[match.group(1).strip()] = clean_section_output(content[match.end():end])
+    return sections
+
+
+async def generate_sections_single_call(section_names: List[str], job_description: str, resume_content: str,
+                                        use_cache: bool = True, profile: Optional[dict] = None) -> Dict[str, str]:
+    """
+    Generate several sections with one completion. Returns only the sections that
+    passed validation; the caller re-requests the rest individually.
+    """
+    results = {}
+    requests = {name: section_request(name, job_description, resume_content, profile) for name in section_names}
+    if use_cache:
+        for name, (_, _, cache_key) in requests.items():
+            cached = await section_cache.get(cache_key)
+            if cached is not None:
+                results[name] = cached
+
+    pending = [name for name in section_names if name not in results]
+    if not pending:
+        return results
+
+    prompt = build_multi_section_prompt(pending, job_description, resume_content, profile)
+    context = set_llm_call_section("multi_section")
+    try:
+        logger.info(f"Requesting {len(pending)} sections in a single call to {AI_PROVIDER} API")
+        content = await call_ai_api(MULTI_SECTION_SYSTEM_PROMPT, prompt, max_tokens=MULTI_SECTION_MAX_TOKENS)
+    except Exception as e:
+        logger.warning(f"Single-call generation failed: {e}")
+        return results
+
+    generated = split_multi_section_output(content)
+    for name in pending:
+        section = generated.get(name)
+        if not section or not section_is_valid(name, section):
+            logger.warning(f"Section {name} missing or invalid in single-call output, will re-request it")
+            continue
+        section, lint_issues = lint_latex_section(section)
+        if lint_issues:
+            logger.warning(f"Section {name} has malformed LaTeX in single-call output: {'; '.join(lint_issues)}")
+            LATEX_LINT_FAILURES.labels(name).inc()
+            if LATEX_LINT_REGENERATE:
+                continue
+        results[name] = section
+        system, section_prompt, _ = requests[name]
+        await section_cache.set(SectionCache.make_key(name, answering_model(context), system, section_prompt), section)
+    return results
+
+
 def generate_fallback_section(section_name: str) -> str:
     """Generate a fallback section if the API fails"""
     fallbacks = {
@@ -420,33 +1860,103 @@ def generate_fallback_section(section_name: str) -> str:
     
     return fallbacks.get(section_name, f"\\section{{{section_name}}}\nInformation not available.")
 
-async def generate_ai_resume(job_description: str, resume_content: str) -> str:
-    """Generate a complete resume by creating each section separately and combining them"""
-    logger.info("Starting section-by-section resume generation")
-    
-    # Generate each section concurrently
-    section_tasks = []
-    for section in RESUME_SECTIONS:
-        if section["required"] or section["name"] in resume_content:
-            task = generate_section(section["name"], job_description, resume_content)
-            section_tasks.append(task)
-    
-    # Wait for all sections to complete
+async def generate_resume_sections(job_description: str, resume_content: str,
+                                   max_concurrency: Optional[int] = None,
+                                   on_section_done: Optional[Callable[[int, int, str], None]] = None,
+                                   use_cache: bool = True,
+                                   generation_mode: Optional[str] = None) -> Tuple[Dict[str, str], Optional[dict]]:
+    """
+    Generate each resume section separately. Returns ({section name: LaTeX} in resume
+    order, condensed profile or None).
+    In "single" generation mode all sections are requested in one completion first,
+    and only the ones that fail validation are generated separately.
+    """
+    generation_mode = (generation_mode or GENERATION_MODE).lower()
+    if generation_mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode: {generation_mode}")
+    logger.info(f"Starting resume generation ({generation_mode} mode)")
+
+    # Bound how many sections of this resume hit the provider at once
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or SECTION_CONCURRENCY))
+
+    completed = 0
+
+    async def generate_bounded(section_name: str) -> str:
+        nonlocal completed
+        try:
+            async with semaphore:
+                return await generate_section(section_name, job_description, resume_content, use_cache, profile)
+        finally:
+            completed += 1
+            if on_section_done:
+                on_section_done(completed, len(selected_sections), section_name)
+
+    selected_sections = [
+        section for section in RESUME_SECTIONS
+        if section["required"] or section["name"] in resume_content
+    ]
+
+    # Condense the resume and job description once instead of resending them with every section
+    profile = await extract_profile(job_description, resume_content, use_cache) if PROFILE_EXTRACTION else None
+    full_text_tokens = sum(
+        estimate_tokens(*build_section_prompts(section["name"], job_description, resume_content))
+        for section in selected_sections
+    )
+    if profile is not None:
+        prompt_tokens = estimate_tokens(
+            PROFILE_SYSTEM_PROMPT, build_profile_prompt(job_description, resume_content)
+        ) + sum(
+            estimate_tokens(*build_section_prompts(section["name"], *profile_context(section["name"], profile)))
+            for section in selected_sections
+        )
+        logger.info(f"Profile mode input tokens (estimated): {prompt_tokens} vs {full_text_tokens} with full-text prompts")
+    else:
+        prompt_tokens = full_text_tokens
+    record_usage(estimated_full_text_input_tokens=full_text_tokens, estimated_input_tokens=prompt_tokens)
+
+    single_call_sections = {}
+    if generation_mode == "single":
+        single_call_sections = await generate_sections_single_call(
+            [section["name"] for section in selected_sections],
+            job_description, resume_content, use_cache, profile
+        )
+        for section_name in single_call_sections:
+            completed += 1
+            if on_section_done:
+                on_section_done(completed, len(selected_sections), section_name)
+
+    async def generate_or_reuse(section_name: str) -> str:
+        if section_name in single_call_sections:
+            return single_call_sections[section_name]
+        return await generate_bounded(section_name)
+
+    # Generate each section concurrently
+    section_tasks = [generate_or_reuse(section["name"]) for section in selected_sections]
+
+    # Wait for all sections to complete
     sections_content = await asyncio.gather(*section_tasks, return_exceptions=True)
-    
+
     # Process results and handle any exceptions
-    final_content = []
-    for i, content in enumerate(sections_content):
-        section_name = RESUME_SECTIONS[i]["name"] if i < len(RESUME_SECTIONS) else f"Section {i}"
+    final_content = {}
+    for section, content in zip(selected_sections, sections_content):
+        section_name = section["name"]
         if isinstance(content, Exception):
             logger.error(f"Error generating section {section_name}: {str(content)}")
-            if RESUME_SECTIONS[i]["required"]:
-                final_content.append(generate_fallback_section(section_name))
+            if section["required"]:
+                final_content[section_name] = generate_fallback_section(section_name)
         else:
-            final_content.append(content)
-    
+            final_content[section_name] = content
+
+    return final_content, profile
+
+
+def assemble_ai_content(sections: Dict[str, str], resume_content: str) -> str:
+    """Join generated sections in resume order, falling back to a basic resume if none is usable."""
+    order = {section["name"]: index for index, section in enumerate(RESUME_SECTIONS)}
+    ordered = sorted(sections.items(), key=lambda item: order.get(item[0], len(order)))
+
     # Combine all sections
-    complete_resume = "\n\n".join(final_content)
+    complete_resume = "\n\n".join(content for _, content in ordered)
     
     # Validate the complete resume
     if "\\section" not in complete_resume:
@@ -455,17 +1965,164 @@ async def generate_ai_resume(job_description: str, resume_content: str) -> str:
     
     return complete_resume
 
+# Pre-compile LaTeX lint, run on every generated section before it is accepted
+LATEX_LINT_REGENERATE = os.getenv("LATEX_LINT_REGENERATE", "true").lower() in ("1", "true", "yes")
+LATEX_TOKEN_PATTERN = re.compile(r"\\(?:[A-Za-z@]+\*?|.)?|[{}#$%&_^]", re.DOTALL)
+LATEX_ENVIRONMENT_ARGUMENT = re.compile(r"\s*\{([A-Za-z*]+)\}")
+LATEX_SPECIAL_ESCAPES = {"#": "\\#", "$": "\\$", "%": "\\%", "&": "\\&", "_": "\\_", "^": "\\^{}"}
+LATEX_LIST_ENVIRONMENTS = {"itemize", "enumerate", "description", "highlights", "highlightsforbulletentries"}
+# Arguments of these commands are URLs, where _ and ^ are literal
+LATEX_URL_COMMANDS = {"url", "href"}
+# Inline math: a $ followed by non-space, closed by the next $ preceded by non-space
+LATEX_MATH_SPAN_PATTERN = re.compile(r"\$(?=[^\s$])(?:\\.|[^$\\])*?(?<=\S)\$", re.DOTALL)
+LATEX_MATH_MARKUP = re.compile(r"[\\^_{]")
+# Environments whose bodies use & as the column separator
+LATEX_ALIGNMENT_ENVIRONMENTS = {"tabular", "tabular*", "tabularx", "array", "longtable"}
+# File access, shell escapes and macro or catcode changes have no place in a resume section;
+# sections can be user-edited (/sessions) or steered by the job description
+LATEX_FORBIDDEN_COMMANDS = {
+    "input", "include", "includeonly", "InputIfFileExists", "IfFileExists", "endinput",
+    "openin", "openout", "read", "readline", "write", "immediate", "closein", "closeout",
+    "catcode", "lccode", "uccode", "scantokens", "everyeof", "csname", "makeatletter",
+    "def", "edef", "gdef", "xdef", "let", "futurelet",
+    "newcommand", "renewcommand", "providecommand", "DeclareRobustCommand",
+    "newenvironment", "renewenvironment", "usepackage", "RequirePackage", "documentclass",
+    "special", "includegraphics", "lstinputlisting", "verbatiminput",
+    "pdffiledump", "pdfmdfivesum", "pdffilesize", "pdffilemoddate", "pdfximage", "pdfobj",
+}
+
+
+def latex_math_span_end(content: str, start: int) -> Optional[int]:
+    """
+    End of the inline math span opened by the $ at `start`, or None if that $ is
+    text. A closing $ followed by a digit only ends math containing markup, so
+    "$5-$10" stays text while "$\\sim$3x" and "$10^6$" are math.
+    """
+    span = LATEX_MATH_SPAN_PATTERN.match(content, start)
+    if not span:
+        return None
+    if content[span.end():span.end() + 1].isdigit() and not LATEX_MATH_MARKUP.search(span.group(), 1):
+        return None
+    return span.end()
+
+
+def lint_latex_section(content: str) -> Tuple[str, List[str]]:
+    """
+    Tokenize a generated section in a single pass. Unescaped specials are escaped
+    silently, except $ around inline math, _ and ^ inside it, and & in tabular
+    bodies. Unbalanced braces, unclosed or stray environments and \\item outside
+    a list are repaired and reported, so the caller can decide to re-generate.
+    Commands in LATEX_FORBIDDEN_COMMANDS and ^^ character codes are removed and
+    reported. Returns (repaired content, problems found).
+    """
+    out: List[str] = []
+    issues: List[str] = []
+    depth = 0
+    environments: List[Tuple[str, int]] = []  # (name, brace depth at \begin)
+    url_depth: Optional[int] = None  # brace depth of the URL argument being read
+    url_pending = False
+    math_end: Optional[int] = None  # end of the inline math span being read
+    position = 0
+
+    def close_environment(name: str, opened_at: int):
+        nonlocal depth
+        if depth > opened_at:
+            issues.append(f"unclosed brace in {name}")
+            out.append("}" * (depth - opened_at))
+            depth = opened_at
+        out.append(f"\\end{{{name}}}")
+
+    while True:
+        match = LATEX_TOKEN_PATTERN.search(content, position)
+        if not match:
+            break
+        out.append(content[position:match.start()])
+        position = match.end()
+        token = match.group()
+        expects_url, url_pending = url_pending, False
+
+        if token == "{":
+            depth += 1
+            if expects_url and url_depth is None:
+                url_depth = depth
+            out.append(token)
+        elif token == "}":
+            if depth == 0 or (environments and depth == environments[-1][1]):
+                issues.append("unmatched }")
+                continue
+            if url_depth == depth:
+                url_depth = None
+            depth -= 1
+            out.append(token)
+        elif token == "\\":
+            continue  # dangling backslash at the very end
+        elif token[0] == "\\":
+            command = token[1:].rstrip("*")
+            if command in LATEX_FORBIDDEN_COMMANDS:
+                issues.append(f"\\{command} is not allowed")
+                continue
+            url_pending = command in LATEX_URL_COMMANDS
+            argument = LATEX_ENVIRONMENT_ARGUMENT.match(content, position) if command in ("begin", "end") else None
+            if argument:
+                position = argument.end()
+                name = argument.group(1)
+                if command == "begin":
+                    environments.append((name, depth))
+                elif not any(open_name == name for open_name, _ in environments):
+                    issues.append(f"\\end{{{name}}} without \\begin")
+                    continue
+                else:
+                    while environments[-1][0] != name:
+                        inner, opened_at = environments.pop()
+                        issues.append(f"unclosed environment {inner}")
+                        close_environment(inner, opened_at)
+                    _, opened_at = environments.pop()
+                    close_environment(name, opened_at)
+                    continue
+                out.append(token + argument.group())
+            elif command == "item" and not any(name in LATEX_LIST_ENVIRONMENTS for name, _ in environments):
+                issues.append("\\item outside a list")
+                out.append("\\textbullet{}")
+            else:
+                out.append(token)
+        elif token == "^" and content.startswith("^", position):
+            # ^^5c and the like spell out any character, including a backslash
+            issues.append("^^ character codes are not allowed")
+            position += 1
+        elif token == "$" and math_end is None and latex_math_span_end(content, match.start()):
+            math_end = latex_math_span_end(content, match.start())
+            out.append(token)
+        elif token == "$" and position == math_end:
+            math_end = None
+            out.append(token)
+        elif (url_depth is not None or math_end is not None) and token in "_^":
+            out.append(token)
+        elif token == "&" and any(name in LATEX_ALIGNMENT_ENVIRONMENTS for name, _ in environments):
+            out.append(token)
+        else:
+            out.append(LATEX_SPECIAL_ESCAPES[token])
+
+    out.append(content[position:])
+    while environments:
+        name, opened_at = environments.pop()
+        issues.append(f"unclosed environment {name}")
+        out.append("\n")
+        close_environment(name, opened_at)
+    if depth:
+        issues.append(f"{depth} unclosed brace(s)")
+        out.append("}" * depth)
+    return "".join(out), issues
+
+
+LATEX_SIMPLE_ESCAPE_PATTERN = re.compile(r"(?<!\\)([#$%&])")
+
+
 def sanitize_latex_simple(text: str) -> str:
     """
     Escapes ONLY # $ % & if they're not already escaped.
     Does NOT touch other special characters or LaTeX environments.
     """
-    chars_to_escape = ['#', '$', '%', '&']
-    
-    for char in chars_to_escape:
-        text = re.sub(rf'(?<!\\)\{char}', rf'\{char}', text)
-    
-    return text
+    return LATEX_SIMPLE_ESCAPE_PATTERN.sub(r"\\\1", text)
 
 
 def generate_fallback_resume(resume_content: str) -> str:
@@ -496,86 +2153,1993 @@ I am a results-driven professional with experience and skills relevant to the po
 """
     return latex
 
-async def generate_pdf_from_latex(latex: str, output_pdf: str, template_path: str) -> str:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_tex_path = os.path.join(temp_dir, "resume.tex")
-        shutil.copy(template_path, temp_tex_path)
+# Preview rendering: the LaTeX subset the section prompts produce, rendered in-process
+OUTPUT_FORMATS = ("pdf", "html", "json")
+PREVIEW_LIST_ENVIRONMENTS = {"itemize": False, "highlights": False, "highlightsforbulletentries": False,
+                             "description": False, "enumerate": True}
+PREVIEW_INLINE_TAGS = {"textbf": "strong", "bf": "strong", "textit": "em", "emph": "em", "it": "em",
+                       "underline": "u", "texttt": "code"}
+PREVIEW_SYMBOLS = {"textbullet": "\u2022", "textbar": "|", "LaTeX": "LaTeX", "TeX": "TeX",
+                   "ldots": "\u2026", "dots": "\u2026", "quad": " ", "qquad": " "}
+# Layout commands whose arguments are not content
+PREVIEW_DROPPED_COMMANDS = {"vspace", "hspace", "needspace", "label"}
+PREVIEW_TEXT_REPLACEMENTS = (("---", "\u2014"), ("--", "\u2013"), ("``", "\u201c"), ("''", "\u201d"), ("~", "\u00a0"))
+PREVIEW_BLOCK_PATTERN = re.compile(
+    r"\\(section|subsection)\*?\s*(?=\{)|\\begin\s*\{(" + "|".join(PREVIEW_LIST_ENVIRONMENTS) + r")\}|\n[ \t]*\n"
+)
+PREVIEW_LIST_TOKEN_PATTERN = re.compile(r"\\item\b\s*(?:\[[^\]]*\])?|\\(begin|end)\s*\{([A-Za-z*]+)\}")
+PREVIEW_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; max-width: 820px; margin: 2em auto; line-height: 1.4; }
+header { text-align: center; margin-bottom: 1em; }
+h2 { border-bottom: 1px solid #000; font-size: 1.15em; margin: 1.2em 0 0.4em; }
+h3 { font-size: 1em; margin: 0.8em 0 0.3em; }
+p { margin: 0.3em 0; }
+ul, ol { margin: 0.2em 0 0.4em; padding-left: 1.4em; }
+.hfill { display: inline-block; width: 2em; }
+"""
 
-        with open(temp_tex_path, "a") as f:
-            f.write("\n" + latex)
 
-        for _ in range(2):
+def check_output_format(output_format: str) -> str:
+    """Normalize an output format, rejecting unknown ones with a 400."""
+    output_format = output_format.lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown output_format '{output_format}', expected one of: {', '.join(OUTPUT_FORMATS)}"
+        )
+    return output_format
+
+
+def read_latex_group(content: str, position: int) -> Tuple[Optional[str], int]:
+    """Read the balanced {...} group at `position` (after whitespace). Returns (inner text or None, end)."""
+    start = position
+    while start < len(content) and content[start] in " \t\n":
+        start += 1
+    if start >= len(content) or content[start] != "{":
+        return None, position
+    depth = 0
+    index = start
+    while index < len(content):
+        char = content[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return content[start + 1:index], index + 1
+        index += 1
+    return content[start + 1:], len(content)
+
+
+def render_latex_inline(content: str) -> Tuple[str, str]:
+    """Render inline LaTeX to (HTML, plain text). Unknown commands are dropped and their arguments kept."""
+    html_parts: List[str] = []
+    text_parts: List[str] = []
+
+    def emit(text: str, markup: Optional[str] = None):
+        text_parts.append(text)
+        html_parts.append(html.escape(text) if markup is None else markup)
+
+    index = 0
+    while index < len(content):
+        char = content[index]
+        if char == "\\":
+            command = re.match(r"[A-Za-z@]+\*?", content[index + 1:])
+            if not command:
+                symbol = content[index + 1:index + 2]
+                index += 2
+                if symbol == "\\":
+                    emit("\n", "<br>")
+                elif symbol == "^":
+                    _, index = read_latex_group(content, index)
+                    emit("^")
+                elif symbol in ", ":
+                    emit(" ")
+                else:
+                    emit(symbol)
+                continue
+            name = command.group().rstrip("*")
+            index += 1 + len(command.group())
+            if name in PREVIEW_INLINE_TAGS:
+                argument, index = read_latex_group(content, index)
+                inner_html, inner_text = render_latex_inline(argument or "")
+                tag = PREVIEW_INLINE_TAGS[name]
+                emit(inner_text, f"<{tag}>{inner_html}</{tag}>")
+            elif name in ("href", "url"):
+                url, index = read_latex_group(content, index)
+                url = (url or "").replace("\\", "")
+                label_html, label_text = html.escape(url), url
+                if name == "href":
+                    label, index = read_latex_group(content, index)
+                    label_html, label_text = render_latex_inline(label or "")
+                emit(label_text, f'<a href="{html.escape(url, quote=True)}">{label_html}</a>')
+            elif name == "hfill":
+                emit(" ", '<span class="hfill"></span>')
+            elif name in ("begin", "end"):
+                _, index = read_latex_group(content, index)
+            elif name in PREVIEW_DROPPED_COMMANDS:
+                _, index = read_latex_group(content, index)
+            elif name in PREVIEW_SYMBOLS:
+                emit(PREVIEW_SYMBOLS[name])
+                if content.startswith("{}", index):
+                    index += 2
+            continue
+        if char in "{}":
+            index += 1
+            continue
+        if char == "%":
+            # Unescaped % starts a comment
+            newline = content.find("\n", index)
+            index = len(content) if newline == -1 else newline
+            continue
+        next_special = re.compile(r"[\\{}%]").search(content, index)
+        end = next_special.start() if next_special else len(content)
+        text = content[index:end]
+        for source, replacement in PREVIEW_TEXT_REPLACEMENTS:
+            text = text.replace(source, replacement)
+        emit(text)
+        index = end
+
+    return "".join(html_parts), re.sub(r"[ \t]+", " ", "".join(text_parts)).strip()
+
+
+def preview_list(content: str, ordered: bool) -> dict:
+    """Split a list environment body into items; nested lists become item children."""
+    items = []
+    depth = 0
+    current: Optional[dict] = None
+    position = 0
+
+    def flush(upto: int):
+        if current is not None:
+            current["raw"] += content[position:upto]
+
+    for match in PREVIEW_LIST_TOKEN_PATTERN.finditer(content):
+        if match.group(1) == "begin":
+            depth += 1
+        elif match.group(1) == "end":
+            depth -= 1
+        elif depth == 0:
+            flush(match.start())
+            current = {"raw": ""}
+            items.append(current)
+            position = match.end()
+    flush(len(content))
+
+    rendered = []
+    for item in items:
+        blocks = preview_blocks(item["raw"])
+        text_blocks = [block for block in blocks if block["type"] == "paragraph"]
+        entry = {
+            "text": " ".join(block["text"] for block in text_blocks),
+            "html": " ".join(block["html"] for block in text_blocks),
+        }
+        children = [block for block in blocks if block["type"] == "list"]
+        if children:
+            entry["children"] = children
+        rendered.append(entry)
+    return {"type": "list", "ordered": ordered, "items": rendered}
+
+
+def preview_blocks(content: str) -> List[dict]:
+    """Parse section LaTeX into heading, paragraph and list blocks."""
+    blocks: List[dict] = []
+    position = 0
+
+    def paragraph(text: str):
+        html_text, plain = render_latex_inline(text)
+        if plain:
+            blocks.append({"type": "paragraph", "text": plain, "html": html_text.strip()})
+
+    while True:
+        match = PREVIEW_BLOCK_PATTERN.search(content, position)
+        if not match:
+            paragraph(content[position:])
+            return blocks
+        paragraph(content[position:match.start()])
+        position = match.end()
+        if match.group(1):
+            title, position = read_latex_group(content, position)
+            html_title, plain_title = render_latex_inline(title or "")
+            blocks.append({"type": "heading", "level": 1 if match.group(1) == "section" else 2,
+                           "text": plain_title, "html": html_title})
+        elif match.group(2):
+            environment = match.group(2)
+            # Skip list options such as [leftmargin=*]
+            options = re.match(r"\s*\[[^\]]*\]", content[position:])
+            if options:
+                position += options.end()
+            depth, body_start = 1, position
+            for token in re.finditer(r"\\(begin|end)\s*\{" + re.escape(environment) + r"\}", content[position:]):
+                depth += 1 if token.group(1) == "begin" else -1
+                if depth == 0:
+                    position += token.end()
+                    body = content[body_start:body_start + token.start()]
+                    break
+            else:
+                body, position = content[body_start:], len(content)
+            blocks.append(preview_list(body, PREVIEW_LIST_ENVIRONMENTS[environment]))
+
+
+def render_preview(session: dict) -> List[dict]:
+    """Structured preview of a session: one entry per section with its blocks."""
+    order = {section["name"]: index for index, section in enumerate(RESUME_SECTIONS)}
+    return [
+        {"name": name, "blocks": preview_blocks(latex)}
+        for name, latex in sorted(session["sections"].items(), key=lambda item: order.get(item[0], len(order)))
+    ]
+
+
+def preview_blocks_html(blocks: List[dict]) -> str:
+    parts = []
+    for block in blocks:
+        if block["type"] == "heading":
+            tag = "h2" if block["level"] == 1 else "h3"
+            parts.append(f"<{tag}>{block['html']}</{tag}>")
+        elif block["type"] == "paragraph":
+            parts.append(f"<p>{block['html']}</p>")
+        else:
+            tag = "ol" if block["ordered"] else "ul"
+            items = "".join(
+                f"<li>{item['html']}{preview_blocks_html(item.get('children', []))}</li>" for item in block["items"]
+            )
+            parts.append(f"<{tag}>{items}</{tag}>")
+    return "\n".join(parts)
+
+
+def strip_preview_html(blocks: List[dict]) -> List[dict]:
+    """Drop the HTML renderings from preview blocks for the JSON output."""
+    stripped = []
+    for block in blocks:
+        block = {key: value for key, value in block.items() if key != "html"}
+        if block["type"] == "list":
+            block["items"] = [
+                dict({"text": item["text"]}, **({"children": strip_preview_html(item["children"])}
+                                               if "children" in item else {}))
+                for item in block["items"]
+            ]
+        stripped.append(block)
+    return stripped
+
+
+def preview_response(session: dict, output_format: str, headers: dict) -> Response:
+    """Render a session as an HTML page or structured JSON."""
+    sections = render_preview(session)
+    contact = session["contact"]
+    if output_format == "json":
+        return JSONResponse(
+            content={
+                "session_id": session["session_id"],
+                "contact": contact,
+                "sections": [{"name": s["name"], "blocks": strip_preview_html(s["blocks"])} for s in sections],
+                "pdf_url": f"/sessions/{session['session_id']}/pdf",
+            },
+            headers=headers
+        )
+
+    details = " | ".join(
+        html.escape(contact[key]) for key in ("location", "email", "phone", "linkedin_link") if contact.get(key)
+    )
+    body = "\n".join(preview_blocks_html(section["blocks"]) for section in sections)
+    page = (
+        f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(contact['name'])}</title>"
+        f"<style>{PREVIEW_STYLE}</style></head>\n<body><header><h1>{html.escape(contact['name'])}</h1>"
+        f"<div>{details}</div></header>\n{body}\n</body></html>"
+    )
+    return HTMLResponse(content=page, headers=headers)
+
+
+# LaTeX compile configuration
+LATEX_CACHE_DIR = os.path.abspath(os.getenv("LATEX_CACHE_DIR", "latex_cache"))
+LATEX_WORKERS = max(1, int(os.getenv("LATEX_WORKERS", str(WORKER_CPUS))))
+LATEX_PRECOMPILE = os.getenv("LATEX_PRECOMPILE", "true").lower() in ("1", "true", "yes")
+LATEX_COMPILE_TIMEOUT = float(os.getenv("LATEX_COMPILE_TIMEOUT", "60"))
+PREAMBLE_DUMP_MARKER = "% end-of-precompiled-preamble"
+LATEX_MAX_PASSES = max(1, int(os.getenv("LATEX_MAX_PASSES", "3")))
+LATEX_RERUN_PATTERN = re.compile(r"Rerun to get|Please rerun|Rerun LaTeX", re.IGNORECASE)
+LATEX_LABEL_RERUN_NOTICE = "Label(s) may have changed. Rerun to get cross-references right."
+LATEX_REFERENCE_PATTERN = re.compile(r"\\(?:ref|pageref|eqref|autoref|nameref|cite)\*?\{")
+
+# Driver read by warm pdflatex workers: it waits for the document file name on
+# stdin, so the process can be started (and the format loaded) ahead of time.
+LATEX_DRIVER = "{\\endlinechar=-1 \\global\\read16 to \\resumebody}\\nonstopmode\\input{\\resumebody}\n"
+
+latex_formats: Dict[str, Optional[str]] = {}
+latex_format_lock = asyncio.Lock()
+latex_pools: Dict[Optional[str], "LatexWorkerPool"] = {}
+# Format each template's pool was last built from, so an edited template retires its old pool
+latex_pool_templates: Dict[str, Optional[str]] = {}
+# Compiles running at once across every template's pool
+latex_compile_slots = asyncio.Semaphore(LATEX_WORKERS)
+
+
+def split_latex_preamble(document: str) -> Tuple[str, str]:
+    """
+    Split a document into the static preamble that can be dumped into a format
+    and the remainder that has to be compiled per request. Without the marker
+    nothing is precompiled: settings formats do not keep (glyphtounicode) could
+    otherwise end up in the format and be lost.
+    """
+    index = document.find(PREAMBLE_DUMP_MARKER)
+    if index == -1:
+        return "", document
+    return document[:index], document[index:]
+
+
+async def build_latex_format(preamble: str) -> Optional[str]:
+    """
+    Dump the preamble into a precompiled pdflatex format and return its name.
+    Formats are content-addressed, so a changed template gets a new format.
+    Returns None if the format cannot be built.
+    """
+    digest = hashlib.sha256(preamble.encode("utf-8")).hexdigest()[:16]
+    if digest in latex_formats:
+        return latex_formats[digest]
+
+    async with latex_format_lock:
+        if digest in latex_formats:
+            return latex_formats[digest]
+
+        fmt_name = f"resume_{digest}"
+        fmt_path = os.path.join(LATEX_CACHE_DIR, f"{fmt_name}.fmt")
+        os.makedirs(LATEX_CACHE_DIR, exist_ok=True)
+        if not os.path.exists(fmt_path):
+            # Built in a private directory and renamed into place, so workers starting
+            # together never load a format another one is still writing
+            build_dir = tempfile.mkdtemp(prefix="build_", dir=LATEX_CACHE_DIR)
+            try:
+                with open(os.path.join(build_dir, f"{fmt_name}.tex"), "w") as f:
+                    f.write(preamble + "\n\\dump\n")
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        "pdflatex",
+                        "-ini",
+                        "-interaction=nonstopmode",
+                        f"-jobname={fmt_name}",
+                        "&pdflatex",
+                        f"{fmt_name}.tex",
+                        cwd=build_dir,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    stdout, stderr = await proc.communicate()
+                except OSError as e:
+                    logger.error(f"Could not run pdflatex to build format: {e}")
+                    latex_formats[digest] = None
+                    return None
+
+                if proc.returncode != 0 or not os.path.exists(os.path.join(build_dir, f"{fmt_name}.fmt")):
+                    logger.warning(f"Failed to build LaTeX format, compiling without it:\n{stdout.decode(errors='replace')}")
+                    latex_formats[digest] = None
+                    return None
+
+                os.replace(os.path.join(build_dir, f"{fmt_name}.fmt"), fmt_path)
+            finally:
+                shutil.rmtree(build_dir, ignore_errors=True)
+
+            logger.info(f"Built precompiled LaTeX format {fmt_name}")
+
+        latex_formats[digest] = fmt_name
+        return fmt_name
+
+
+class LatexWorkerPool:
+    """
+    Keeps pdflatex processes started ahead of time with the format loaded,
+    waiting for a document. Each process compiles a single pass and is then
+    replaced in the background.
+    """
+
+    def __init__(self, fmt_name: Optional[str], size: int):
+        self.fmt_name = fmt_name
+        self.size = size
+        self.ready: Deque[Tuple[str, asyncio.subprocess.Process]] = deque()
+        self.replenish_tasks: set = set()
+        self.spawning = 0
+        self.closed = False
+
+    async def spawn(self) -> Tuple[str, asyncio.subprocess.Process]:
+        work_dir = tempfile.mkdtemp(prefix="latex_worker_")
+        with open(os.path.join(work_dir, "driver.tex"), "w") as f:
+            f.write(LATEX_DRIVER)
+
+        args = ["pdflatex", "-no-shell-escape", "-interaction=scrollmode", "-jobname=resume"]
+        env = os.environ.copy()
+        # Documents may only read and write files in their work directory, and never run commands
+        env.update(openin_any="p", openout_any="p", shell_escape="f")
+        if self.fmt_name:
+            args.append(f"-fmt={self.fmt_name}")
+            # Trailing separator keeps kpathsea's default format search path
+            env["TEXFORMATS"] = LATEX_CACHE_DIR + os.pathsep
+        args.append("driver.tex")
+
+        try:
             proc = await asyncio.create_subprocess_exec(
-                "pdflatex",
-                "-interaction=nonstopmode",
-                "resume.tex",
-                cwd=temp_dir,
+                *args,
+                cwd=work_dir,
+                env=env,
+                stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
-            stdout, stderr = await proc.communicate()
+        except OSError:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+        return work_dir, proc
+
+    async def start(self):
+        """Pre-start `size` warm workers."""
+        while len(self.ready) < self.size and not self.closed:
+            self.ready.append(await self.spawn())
+
+    async def replenish(self):
+        if self.closed or len(self.ready) + self.spawning >= self.size:
+            return
+        self.spawning += 1
+        try:
+            self.ready.append(await self.spawn())
+        except Exception as e:
+            logger.warning(f"Failed to start warm pdflatex worker: {e}")
+        finally:
+            self.spawning -= 1
+
+    def take_worker(self) -> Optional[Tuple[str, asyncio.subprocess.Process]]:
+        while self.ready:
+            work_dir, proc = self.ready.popleft()
+            if proc.returncode is None:
+                return work_dir, proc
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return None
 
-            if proc.returncode != 0:
-                error_log = stdout.decode() + "\n" + stderr.decode()
-                logger.error(f"LaTeX compile error:\n{error_log}")
+    async def compile_pass(self, body: str, job_dir: str) -> Tuple[int, str]:
+        """
+        Run one pdflatex pass over `body` on a warm worker. Artifacts from a
+        previous pass (.aux) are read from and written back to `job_dir`.
+        Returns (returncode, compiler output).
+        """
+        async with latex_compile_slots:
+            worker = self.take_worker() or await self.spawn()
+            task = asyncio.create_task(self.replenish())
+            self.replenish_tasks.add(task)
+            task.add_done_callback(self.replenish_tasks.discard)
+
+            work_dir, proc = worker
+            try:
+                with open(os.path.join(work_dir, "resume_body.tex"), "w") as f:
+                    f.write(body)
+                aux_path = os.path.join(job_dir, "resume.aux")
+                if os.path.exists(aux_path):
+                    shutil.copy(aux_path, work_dir)
+
+                try:
+                    stdout, stderr = await asyncio.wait_for(
+                        proc.communicate(b"resume_body.tex\n"), LATEX_COMPILE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    return -1, f"pdflatex timed out after {LATEX_COMPILE_TIMEOUT}s"
+
+                for artifact in ("resume.aux", "resume.log", "resume.pdf"):
+                    artifact_path = os.path.join(work_dir, artifact)
+                    if os.path.exists(artifact_path):
+                        shutil.copy(artifact_path, job_dir)
+
+                return proc.returncode, stdout.decode(errors="replace") + "\n" + stderr.decode(errors="replace")
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def close(self):
+        self.closed = True
+        for task in list(self.replenish_tasks):
+            task.cancel()
+        while self.ready:
+            work_dir, proc = self.ready.popleft()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def get_latex_pool(preamble: str, template_name: str) -> "LatexWorkerPool":
+    """Return the warm worker pool for the format built from `preamble`."""
+    fmt_name = await build_latex_format(preamble) if LATEX_PRECOMPILE and preamble else None
+    previous = latex_pool_templates.get(template_name, fmt_name)
+    latex_pool_templates[template_name] = fmt_name
+    if previous != fmt_name and previous in latex_pools and previous not in latex_pool_templates.values():
+        # The template changed: retire workers holding its old format
+        await latex_pools.pop(previous).close()
+
+    pool = latex_pools.get(fmt_name)
+    if pool is None:
+        pool = LatexWorkerPool(fmt_name, LATEX_WORKERS)
+        latex_pools[fmt_name] = pool
+    return pool
+
+
+@app.on_event("startup")
+async def warm_latex_workers():
+    async def warm():
+        try:
+            template = template_registry.get(DEFAULT_TEMPLATE)
+            pool = await get_latex_pool(template.preamble, template.name)
+            await pool.start()
+            logger.info(f"Started {pool.size} warm pdflatex workers (format: {pool.fmt_name or 'none'})")
+        except Exception as e:
+            logger.warning(f"Could not pre-warm pdflatex workers: {e}")
+
+    task = asyncio.create_task(warm())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def stop_latex_workers():
+    for fmt_name in list(latex_pools):
+        await latex_pools.pop(fmt_name).close()
+
+
+def read_text_if_exists(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", errors="replace") as f:
+        return f.read()
+
+
+def latex_needs_rerun(log: str, aux_before: Optional[str], aux_after: Optional[str], uses_references: bool) -> bool:
+    """
+    Decide whether another pdflatex pass is needed, the way latexmk does:
+    explicit rerun requests in the log, or changed .aux data the document
+    actually refers to.
+    """
+    # TeX hard-wraps log lines, so match against the unwrapped text
+    flat_log = log.replace("\n", "")
+    if uses_references and aux_before != aux_after:
+        return True
+    # The kernel's label notice fires for any new label (e.g. lastpage's LastPage)
+    # even when nothing refers to it; that case is covered by the .aux check above.
+    flat_log = flat_log.replace(LATEX_LABEL_RERUN_NOTICE, "")
+    return bool(LATEX_RERUN_PATTERN.search(flat_log))
+
+
+async def generate_pdf_from_latex(template: "CompiledTemplate", body: str, output_pdf: str) -> Tuple[str, int]:
+    """
+    Compile `body`, the filled part of `template` after its preamble, to
+    `output_pdf`. Returns the PDF path and the number of passes run.
+    """
+    # The precompiled format already contains the preamble, so only the rest is compiled
+    pool = await get_latex_pool(template.preamble, template.name)
+    if not pool.fmt_name:
+        body = template.preamble + body
+    uses_references = bool(LATEX_REFERENCE_PATTERN.search(body))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        aux_path = os.path.join(temp_dir, "resume.aux")
+        passes = 0
+        while passes < LATEX_MAX_PASSES:
+            aux_before = read_text_if_exists(aux_path)
+            with LATEX_PASS_DURATION.time():
+                returncode, output = await pool.compile_pass(body, temp_dir)
+            passes += 1
+
+            if returncode != 0:
+                logger.error(f"LaTeX compile error:\n{output}")
                 raise HTTPException(status_code=500, detail="PDF generation failed")
 
+            log = read_text_if_exists(os.path.join(temp_dir, "resume.log")) or output
+            if not latex_needs_rerun(log, aux_before, read_text_if_exists(aux_path), uses_references):
+                break
+
+        logger.info(f"LaTeX compiled in {passes} pass(es)")
         final_pdf = os.path.join(temp_dir, "resume.pdf")
-        shutil.copy(final_pdf, output_pdf)
-        return output_pdf
+        # Replace rather than overwrite: output_pdf may be a hard link to a deduplicated blob
+        shutil.copy(final_pdf, f"{output_pdf}.tmp")
+        os.replace(f"{output_pdf}.tmp", output_pdf)
+        return output_pdf, passes
+
+# Resume templates: parsed once, reparsed when the file changes, selectable per request
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", "templates")
+DEFAULT_TEMPLATE = "default"
+# Template placeholder -> contact field it is filled from
+TEMPLATE_CONTACT_FIELDS = {
+    "Name": "name", "Email": "email", "Phone": "phone", "LinkedinLink": "linkedin_link", "Location": "location"
+}
+TEMPLATE_FIELD_PATTERN = re.compile(
+    r"\{(" + "|".join(re.escape(field) for field in [*TEMPLATE_CONTACT_FIELDS, "AI Content"]) + r")\}"
+)
+# A placeholder right after one of these is a link target, not running text
+TEMPLATE_URL_CONTEXT = re.compile(r"(?:\\(?:href\w*|url)\s*\{|mailto:)$")
+LATEX_TEXT_ESCAPES = {
+    "\\": "\\textbackslash{}", "{": "\\{", "}": "\\}", "#": "\\#", "$": "\\$", "%": "\\%",
+    "&": "\\&", "_": "\\_", "^": "\\^{}", "~": "\\textasciitilde{}"
+}
+LATEX_TEXT_ESCAPE_PATTERN = re.compile(r"[\\{}#$%&_^~]")
+# Inside a link target only % and # need escaping; braces, backslashes and spaces cannot be part of a URL
+LATEX_URL_ESCAPE_PATTERN = re.compile(r"([%#])|[\\{}\s]")
+
+
+def escape_latex_text(value: str) -> str:
+    return LATEX_TEXT_ESCAPE_PATTERN.sub(lambda m: LATEX_TEXT_ESCAPES[m.group()], value)
+
+
+def escape_latex_url(value: str) -> str:
+    return LATEX_URL_ESCAPE_PATTERN.sub(lambda m: f"\\{m.group(1)}" if m.group(1) else "", value)
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and placeholder slots. The static
+    preamble is kept apart for the precompiled format; the rest is filled per
+    request in a single pass.
+    """
+
+    def __init__(self, name: str, path: str, source: str, version: Tuple[int, int]):
+        self.name = name
+        self.path = path
+        self.version = version
+        preamble, body = split_latex_preamble(source)
+        if PREAMBLE_DUMP_MARKER not in source:
+            logger.warning(f"Template {name} has no '{PREAMBLE_DUMP_MARKER}' line, compiling it without a precompiled format")
+        if TEMPLATE_FIELD_PATTERN.search(preamble):
+            # Per-request values in the preamble rule out dumping it into a format
+            preamble, body = "", source
+        self.preamble = preamble
+        self.literals: List[str] = []
+        # (field, escaper) per slot; literals[i] precedes slots[i]
+        self.slots: List[Tuple[str, Optional[Callable[[str], str]]]] = []
+
+        position = 0
+        for match in TEMPLATE_FIELD_PATTERN.finditer(body):
+            literal = body[position:match.start()]
+            field = match.group(1)
+            if field not in TEMPLATE_CONTACT_FIELDS:
+                escaper = None
+            elif TEMPLATE_URL_CONTEXT.search(literal):
+                escaper = escape_latex_url
+            else:
+                escaper = escape_latex_text
+            self.literals.append(literal)
+            self.slots.append((field, escaper))
+            position = match.end()
+        self.literals.append(body[position:])
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fill the document body. Contact fields are escaped; "AI Content" is inserted as LaTeX."""
+        escaped: Dict[Tuple[str, Optional[Callable[[str], str]]], str] = {}
+        parts = []
+        for literal, slot in zip(self.literals, self.slots):
+            if slot not in escaped:
+                field, escaper = slot
+                escaped[slot] = escaper(values[field]) if escaper else values[field]
+            parts.append(literal)
+            parts.append(escaped[slot])
+        parts.append(self.literals[-1])
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """
+    Templates available to requests: the default template plus every .tex file
+    in TEMPLATE_DIR, named after the file. Compiled templates are cached and
+    reparsed when their file changes.
+    """
+
+    def __init__(self, default_path: str, directory: str):
+        self.default_path = default_path
+        self.directory = directory
+        self.directory_version: Optional[int] = None
+        self.paths: Dict[str, str] = {}
+        self.compiled: Dict[str, CompiledTemplate] = {}
+
+    def refresh(self):
+        try:
+            version = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            version = None
+        if self.paths and version == self.directory_version:
+            return
+
+        paths = {}
+        if version is not None:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".tex") and entry.is_file():
+                    paths[entry.name[:-len(".tex")]] = entry.path
+        paths[DEFAULT_TEMPLATE] = self.default_path
+        self.paths, self.directory_version = paths, version
+        self.compiled = {name: compiled for name, compiled in self.compiled.items() if name in paths}
+
+    def names(self) -> List[str]:
+        self.refresh()
+        return sorted(self.paths)
+
+    def get(self, name: str) -> CompiledTemplate:
+        self.refresh()
+        path = self.paths.get(name)
+        if path is None:
+            raise HTTPException(status_code=400, detail=f"Unknown template '{name}', available: {', '.join(self.names())}")
+
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        compiled = self.compiled.get(name)
+        if compiled is None or compiled.version != version or compiled.path != path:
+            with open(path, "r") as f:
+                compiled = CompiledTemplate(name, path, f.read(), version)
+            self.compiled[name] = compiled
+            logger.info(f"Loaded template {name} from {path} ({len(compiled.slots)} placeholders)")
+        return compiled
+
+
+template_registry = TemplateRegistry(TEMPLATE_PATH, TEMPLATE_DIR)
+
+
+def check_template(template: Optional[str]) -> str:
+    """Validate a requested template name, defaulting to the default template."""
+    template = template or DEFAULT_TEMPLATE
+    template_registry.get(template)
+    return template
+
+
+async def compile_resume(contact: dict, ai_content: str, tex_path: str, pdf_path: str,
+                         template_name: str = DEFAULT_TEMPLATE) -> int:
+    """Fill the template with contact details and AI content, compile it and return the pass count."""
+    template = template_registry.get(template_name)
+    values = {field: contact[key] for field, key in TEMPLATE_CONTACT_FIELDS.items()}
+    # Every section was linted when it was accepted, which escapes specials outside math and tabulars
+    values["AI Content"] = ai_content
+    body = template.render(values)
+
+    # Kept next to the PDF for debugging; the compile itself works from memory
+    with open(tex_path, "w") as f:
+        f.write(template.preamble)
+        f.write(body)
+
+    _, latex_passes = await generate_pdf_from_latex(template, body, pdf_path)
+    resume_storage.deduplicate(pdf_path)
+    return latex_passes
+
+
+# Generated resume storage: retention by age and size, PDFs deduplicated by content hash
+OUTPUT_MAX_AGE = int(os.getenv("OUTPUT_MAX_AGE", str(7 * 24 * 3600)))
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", str(1024 * 1024 * 1024)))
+OUTPUT_CLEANUP_INTERVAL = float(os.getenv("OUTPUT_CLEANUP_INTERVAL", "600"))
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ResumeStorage:
+    """
+    Keeps OUTPUT_DIR bounded. Each PDF is stored once under blobs/<sha256>.pdf and
+    the per-request file names are hard links to it. Files older than max_age are
+    removed, then the oldest ones until the directory fits in max_bytes; blobs go
+    away with their last link.
+    """
+
+    def __init__(self, root: str, max_age: int, max_bytes: int):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hashes: "OrderedDict[Tuple[int, int, int], str]" = OrderedDict()
+        self.dedup_hits = 0
+        self.removed = 0
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def deduplicate(self, path: str):
+        """Replace `path` with a link to the blob holding identical bytes, creating it if needed."""
+        digest = self.etag(path)
+        blob = os.path.join(self.blob_dir, f"{digest}.pdf")
+        try:
+            if os.path.exists(blob):
+                if os.path.samefile(blob, path):
+                    return
+                os.link(blob, f"{path}.link")
+                os.replace(f"{path}.link", path)
+                self.dedup_hits += 1
+            else:
+                os.link(path, blob)
+        except OSError as e:
+            # No hard links on this filesystem, or the blob was collected meanwhile: keep the plain file
+            logger.warning(f"Could not deduplicate {path}: {e}")
+
+    def etag(self, path: str) -> str:
+        """SHA-256 of a stored file, memoized by inode, size and mtime."""
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        digest = self.hashes.get(key)
+        if digest is None:
+            digest = file_sha256(path)
+            self.hashes[key] = digest
+            if len(self.hashes) > 4096:
+                self.hashes.popitem(last=False)
+        return digest
+
+    def cleanup(self):
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.root):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # removed by another worker's sweep
+            if self.max_age and now - stat.st_mtime > self.max_age:
+                self.remove(entry.path)
+            else:
+                files.append((stat.st_mtime, entry.path, stat))
+
+        if self.max_bytes:
+            # Linked copies share their blob's bytes, so each inode is counted once
+            names: Dict[int, int] = {}
+            sizes: Dict[int, int] = {}
+            for _, _, stat in files:
+                names[stat.st_ino] = names.get(stat.st_ino, 0) + 1
+                sizes[stat.st_ino] = stat.st_size
+            total = sum(sizes.values())
+            for _, path, stat in sorted(files, key=lambda item: item[0]):
+                if total <= self.max_bytes:
+                    break
+                self.remove(path)
+                names[stat.st_ino] -= 1
+                if not names[stat.st_ino]:
+                    total -= stat.st_size
+
+        # Blobs whose last named link is gone
+        for entry in os.scandir(self.blob_dir):
+            try:
+                orphaned = entry.stat().st_nlink <= 1
+            except FileNotFoundError:
+                continue
+            if orphaned:
+                self.remove(entry.path)
+
+    def remove(self, path: str):
+        try:
+            os.remove(path)
+            self.removed += 1
+        except FileNotFoundError:
+            pass
+
+    def snapshot(self) -> dict:
+        return {"dedup_hits": self.dedup_hits, "files_removed": self.removed,
+                "max_age": self.max_age, "max_bytes": self.max_bytes}
+
+
+resume_storage = ResumeStorage(OUTPUT_DIR, OUTPUT_MAX_AGE, OUTPUT_MAX_BYTES)
+storage_cleanup_task: Optional[asyncio.Task] = None
+
+
+async def storage_cleanup_loop():
+    while True:
+        try:
+            await asyncio.to_thread(resume_storage.cleanup)
+        except Exception:
+            logger.exception("Generated resume cleanup failed:")
+        await asyncio.sleep(OUTPUT_CLEANUP_INTERVAL)
+
+
+@app.on_event("startup")
+async def start_storage_cleanup():
+    global storage_cleanup_task
+    if OUTPUT_CLEANUP_INTERVAL > 0 and (OUTPUT_MAX_AGE or OUTPUT_MAX_BYTES):
+        storage_cleanup_task = asyncio.create_task(storage_cleanup_loop())
+
+
+@app.on_event("shutdown")
+async def stop_storage_cleanup():
+    if storage_cleanup_task:
+        storage_cleanup_task.cancel()
+        await asyncio.gather(storage_cleanup_task, return_exceptions=True)
+
+
+def attachment_disposition(filename: str) -> str:
+    """
+    Content-Disposition for a download named `filename`: an ASCII fallback for old
+    clients plus the exact UTF-8 name (RFC 6266). Headers must be Latin-1, and names
+    come from the form.
+    """
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def pdf_file_response(request: Request, path: str, filename: str, headers: Optional[dict] = None) -> Response:
+    """Serve a stored PDF with a content-hash ETag, conditional GET and single byte-range support."""
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Resume not found, it may have expired")
+    etag = f'"{resume_storage.etag(path)}"'
+    headers = dict(headers or {}, **{"ETag": etag, "Accept-Ranges": "bytes"})
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # Malformed and multi-range headers are ignored and get the whole file, as RFC 7233 allows
+    range_header = request.headers.get("range")
+    match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    first, last = match.groups() if match else ("", "")
+    well_formed = bool(first or last) and not (first and last and int(last) < int(first))
+    if well_formed and request.headers.get("if-range", etag) == etag:
+        size = os.path.getsize(path)
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start > end:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        with open(path, "rb") as f:
+            f.seek(start)
+            content = f.read(end - start + 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(content=content, status_code=206, media_type="application/pdf", headers=headers)
+
+    return FileResponse(path=path, filename=filename, media_type="application/pdf", headers=headers)
+
+
+# Generation sessions: inputs and per-section LaTeX kept for incremental edits
+SESSION_DIR = os.getenv("SESSION_DIR", os.path.join(OUTPUT_DIR, "sessions"))
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+SESSION_PRUNE_INTERVAL = 3600
+
+session_locks: Dict[str, asyncio.Lock] = {}
+sessions_pruned_at = 0.0
+
+
+def session_path(session_id: str) -> str:
+    try:
+        session_id = str(uuid.UUID(session_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return os.path.join(SESSION_DIR, f"{session_id}.json")
+
+
+def save_session(session: dict):
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    path = session_path(session["session_id"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    prune_expired_sessions()
+
+
+def load_session(session_id: str) -> dict:
+    path = session_path(session_id)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if time.time() - session["updated_at"] > SESSION_TTL:
+        raise HTTPException(status_code=404, detail="Session expired")
+    return session
+
+
+def prune_expired_sessions():
+    """Delete sessions not updated within SESSION_TTL, at most once per SESSION_PRUNE_INTERVAL."""
+    global sessions_pruned_at
+    now = time.time()
+    if now - sessions_pruned_at < SESSION_PRUNE_INTERVAL:
+        return
+    sessions_pruned_at = now
+    for entry in os.scandir(SESSION_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if now - entry.stat().st_mtime <= SESSION_TTL:
+                continue
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # removed by another worker
+        lock = session_locks.get(entry.name[:-len(".json")])
+        if lock and not lock.locked():
+            session_locks.pop(entry.name[:-len(".json")], None)
+
+
+async def build_resume_pdf(
+    name: str,
+    email: str,
+    phone: str,
+    linkedin_link: str,
+    location: str,
+    job_description: str,
+    upload_path: str,
+    section_concurrency: Optional[int] = None,
+    progress: Optional[Callable[..., None]] = None,
+    use_cache: bool = True,
+    generation_mode: Optional[str] = None,
+    template: str = DEFAULT_TEMPLATE
+) -> Tuple[str, str]:
+    """
+    Run the full generation pipeline for an uploaded resume file.
+    Returns (pdf_path, pdf_filename). `progress` is called with the stage name
+    and stage details as the pipeline advances.
+    """
+    if progress:
+        progress("extracting")
+    resume_text = await extract_text_from_file(upload_path)
+
+    return await render_resume_pdf(
+        name, email, phone, linkedin_link, location, job_description, resume_text,
+        section_concurrency, progress, use_cache, generation_mode, template
+    )
+
+
+async def render_resume_pdf(
+    name: str,
+    email: str,
+    phone: str,
+    linkedin_link: str,
+    location: str,
+    job_description: str,
+    resume_text: str,
+    section_concurrency: Optional[int] = None,
+    progress: Optional[Callable[..., None]] = None,
+    use_cache: bool = True,
+    generation_mode: Optional[str] = None,
+    template: str = DEFAULT_TEMPLATE
+) -> Tuple[str, str]:
+    """Generate and compile a tailored resume from already extracted resume text."""
+    session = await generate_resume_session(
+        name, email, phone, linkedin_link, location, job_description, resume_text,
+        section_concurrency, progress, use_cache, generation_mode, template
+    )
+
+    if progress:
+        progress("compiling")
+    pdf_path, latex_passes = await compile_session(session)
+    if progress:
+        progress("compiled", latex_passes=latex_passes)
+
+    logger.info(f"Resume generated for {log_pii(name)} (session {session['session_id']})")
+    return pdf_path, session["pdf_filename"]
+
+
+async def generate_resume_session(
+    name: str,
+    email: str,
+    phone: str,
+    linkedin_link: str,
+    location: str,
+    job_description: str,
+    resume_text: str,
+    section_concurrency: Optional[int] = None,
+    progress: Optional[Callable[..., None]] = None,
+    use_cache: bool = True,
+    generation_mode: Optional[str] = None,
+    template: str = DEFAULT_TEMPLATE
+) -> dict:
+    """Generate every section and persist them as a new session, without compiling."""
+    def report(stage: str, **details):
+        if progress:
+            progress(stage, **details)
+
+    session_id = str(uuid.uuid4())
+
+    report("generating")
+    usage = {}
+    usage_token = llm_usage.set(usage)
+    GENERATIONS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        sections, profile = await generate_resume_sections(
+            job_description, resume_text, section_concurrency,
+            on_section_done=lambda done, total, section: report(
+                "generating", sections_completed=done, sections_total=total, section=section
+            ),
+            use_cache=use_cache,
+            generation_mode=generation_mode
+        )
+    finally:
+        llm_usage.reset(usage_token)
+        GENERATIONS_IN_FLIGHT.dec()
+        record_stage("generation", time.perf_counter() - started)
+    logger.info(f"LLM usage for {log_pii(name)}: {usage}")
+
+    # Persisted before compiling so a section that breaks the compile can still be fixed
+    session = {
+        "session_id": session_id,
+        "contact": {"name": name, "email": email, "phone": phone, "linkedin_link": linkedin_link, "location": location},
+        "job_description": job_description,
+        "resume_text": resume_text,
+        "profile": profile,
+        "sections": sections,
+        "template": template,
+        "pdf_filename": f"{name}_{session_id}.pdf",
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    save_session(session)
+    report("generated", session_id=session_id, **usage)
+    return session
+
+
+async def compile_session(session: dict) -> Tuple[str, int]:
+    """Compile a session's current sections. Returns the PDF path and the number of passes run."""
+    pdf_path = os.path.join(OUTPUT_DIR, session["pdf_filename"])
+    tex_path = f"{os.path.splitext(pdf_path)[0]}.tex"
+    ai_content = assemble_ai_content(session["sections"], session["resume_text"])
+    started = time.perf_counter()
+    try:
+        latex_passes = await compile_resume(
+            session["contact"], ai_content, tex_path, pdf_path, session.get("template", DEFAULT_TEMPLATE)
+        )
+    finally:
+        record_stage("compile", time.perf_counter() - started)
+    return pdf_path, latex_passes
+
+
+# Single-flight: identical requests in flight share one generation
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() in ("1", "true", "yes")
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def wait_for_client(task: "asyncio.Future", request: Optional[Request]):
+    """Await a shared task on behalf of one client, giving up (without cancelling it) if the client leaves."""
+    shielded = asyncio.shield(task)
+    if request is None:
+        return await shielded
+
+    async def watch_disconnect():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await asyncio.wait({shielded, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if shielded.done():
+            return shielded.result()
+        raise ClientDisconnected()
+    finally:
+        watcher.cancel()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: callers with the same key attach to the
+    call already in flight and get its result. The shared call is cancelled once
+    every caller has disconnected. Flights are per process, so identical requests
+    sent to different web workers are not coalesced.
+    """
+
+    def __init__(self):
+        self.flights: Dict[str, dict] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable], request: Optional[Request] = None):
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = {"task": asyncio.create_task(factory()), "waiters": 0}
+            self.flights[key] = flight
+            flight["task"].add_done_callback(lambda _: self.forget(key, flight))
+        else:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+            logger.info(f"Attached request to in-flight generation {key[:12]} ({flight['waiters'] + 1} waiting)")
+
+        flight["waiters"] += 1
+        try:
+            return await wait_for_client(flight["task"], request)
+        finally:
+            flight["waiters"] -= 1
+            if flight["waiters"] == 0 and not flight["task"].done():
+                logger.info(f"All clients of generation {key[:12]} disconnected, cancelling it")
+                flight["task"].cancel()
+                self.forget(key, flight)
+
+    def forget(self, key: str, flight: dict):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    def snapshot(self) -> dict:
+        return {"in_flight": len(self.flights), "coalesced": self.coalesced}
+
+
+generation_flights = SingleFlight()
+
+
+def request_fingerprint(upload_path: str, **fields) -> str:
+    """Hash of the uploaded bytes and every form field that affects the output."""
+    digest = hashlib.sha256(file_sha256(upload_path).encode())
+    digest.update(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode())
+    return digest.hexdigest()
+
 
 @app.post("/generate-resume", response_class=FileResponse)
 async def generate_resume(
+    request: Request,
     name: str = Form(...),
     email: str = Form(...),
     phone: str = Form(...),
     linkedin_link: str = Form(...),
     location: str = Form(...),
     job_description: str = Form(...),
-    resume_file: UploadFile = File(...)
+    resume_file: UploadFile = File(...),
+    section_concurrency: Optional[int] = Form(None),
+    use_cache: bool = Form(True),
+    generation_mode: Optional[str] = Form(None),
+    output_format: str = Form("pdf"),
+    template: str = Form(DEFAULT_TEMPLATE)
 ):
-    session_id = str(uuid.uuid4())
-    tex_filename = f"{name}_{session_id}.tex"
-    pdf_filename = f"{name}_{session_id}.pdf"
-    tex_path = os.path.join(OUTPUT_DIR, tex_filename)
-    pdf_path = os.path.join(OUTPUT_DIR, pdf_filename)
+    logger.info(f"Processing resume for {log_pii(name)}")
+    logger.info(f"job description: {log_payload(job_description)}")
+    check_generation_mode(generation_mode)
+    output_format = check_output_format(output_format)
+    template = check_template(template)
 
-    logger.info(f"Processing resume for {name}")
-    logger.info(f"job description: {job_description}")
+    tmp_path = await save_upload(resume_file)
+    upload_claimed = False
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(resume_file.filename)[1]) as tmp:
-        content = await resume_file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    async def generate() -> Tuple[str, object, dict]:
+        stats = {}
+        try:
+            if output_format != "pdf":
+                # Preview: generate and render in-process, compile later via /sessions/{id}/pdf
+                session = await generate_resume_session(
+                    name, email, phone, linkedin_link, location, job_description,
+                    await extract_text_from_file(tmp_path), section_concurrency,
+                    progress=lambda stage, **details: stats.update(details),
+                    use_cache=use_cache,
+                    generation_mode=generation_mode,
+                    template=template
+                )
+                return "preview", session, stats
 
-    try:
-        resume_text = await extract_text_from_file(tmp_path)
-        ai_content = await generate_ai_resume(job_description, resume_text)
+            pdf_path, pdf_filename = await build_resume_pdf(
+                name, email, phone, linkedin_link, location, job_description,
+                tmp_path, section_concurrency,
+                progress=lambda stage, **details: stats.update(details),
+                use_cache=use_cache,
+                generation_mode=generation_mode,
+                template=template
+            )
+            return "pdf", (pdf_path, pdf_filename), stats
+        finally:
+            os.remove(tmp_path)
+
+    def claim_upload():
+        nonlocal upload_claimed
+        upload_claimed = True
+        return generate()
 
-        with open(TEMPLATE_PATH, "r") as f:
-            template = f.read()
+    try:
+        if COALESCE_REQUESTS:
+            key = await asyncio.to_thread(
+                request_fingerprint, tmp_path, name=name, email=email, phone=phone, linkedin_link=linkedin_link, location=location,
+                job_description=job_description, use_cache=use_cache,
+                generation_mode=(generation_mode or GENERATION_MODE).lower(), output_format=output_format,
+                template=template
+            )
+            kind, result, stats = await generation_flights.do(key, claim_upload, request)
+        else:
+            kind, result, stats = await claim_upload()
 
-        template_filled = template.replace("{Name}", name)\
-            .replace("{Email}", email)\
-            .replace("{Phone}", phone)\
-            .replace("{LinkedinLink}", linkedin_link)\
-            .replace("{Location}", location)\
-            .replace("{AI Content}", sanitize_latex_simple(ai_content))
+        headers = {
+            "X-Prompt-Tokens": str(stats.get("prompt_tokens", 0)),
+            "X-Estimated-Full-Text-Input-Tokens": str(stats.get("estimated_full_text_input_tokens", 0)),
+            "X-Session-Id": stats.get("session_id", "")
+        }
+        if kind == "preview":
+            return preview_response(result, output_format, headers)
 
-        with open(tex_path, "w") as f:
-            f.write(template_filled)
+        pdf_path, pdf_filename = result
+        return FileResponse(
+            path=pdf_path,
+            filename=pdf_filename,
+            media_type="application/pdf",
+            headers={
+                "X-LaTeX-Passes": str(stats.get("latex_passes", 0)),
+                **headers,
+                "X-Resume-Url": f"/resumes/{quote(pdf_filename)}"
+            }
+        )
 
-        await generate_pdf_from_latex(ai_content, pdf_path, tex_path)
+    except ClientDisconnected:
+        logger.info(f"Client disconnected before the resume for {log_pii(name)} was ready")
+        return Response(status_code=499)
 
-        logger.info(f"Resume generated for {name}, file saved as {pdf_filename}")
-        return FileResponse(path=pdf_path, filename=pdf_filename, media_type="application/pdf")
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.exception("Failed to generate resume:")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
     finally:
+        # Requests that attached to an identical generation never hand their upload over
+        if not upload_claimed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Streaming progress: Server-Sent Events while a resume is generated
+# Comment lines sent while nothing else happens, so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate-resume/stream")
+async def generate_resume_stream(
+    name: str = Form(...),
+    email: str = Form(...),
+    phone: str = Form(...),
+    linkedin_link: str = Form(...),
+    location: str = Form(...),
+    job_description: str = Form(...),
+    resume_file: UploadFile = File(...),
+    section_concurrency: Optional[int] = Form(None),
+    use_cache: bool = Form(True),
+    generation_mode: Optional[str] = Form(None),
+    template: str = Form(DEFAULT_TEMPLATE),
+    stream_tokens: bool = Form(False)
+):
+    """
+    Generate a resume like /generate-resume, but answer at once with a stream of
+    Server-Sent Events reporting each stage as it finishes. The last event is
+    `done` with the download URL of the PDF, or `error`.
+    """
+    logger.info(f"Processing streamed resume for {log_pii(name)}")
+    check_generation_mode(generation_mode)
+    template = check_template(template)
+
+    tmp_path = await save_upload(resume_file)
+    events: asyncio.Queue = asyncio.Queue()
+    details = {}
+
+    def emit(event: str, **data):
+        details.update(data)
+        events.put_nowait((event, data))
+
+    async def run():
+        try:
+            emit("extracting")
+            try:
+                resume_text = await extract_text_from_file(tmp_path)
+            finally:
+                os.remove(tmp_path)
+            emit("extracted", characters=len(resume_text))
+
+            if stream_tokens:
+                llm_token_listener.set(
+                    lambda section, call_id, delta: events.put_nowait(
+                        ("token", {"section": section, "call": call_id, "delta": delta})
+                    )
+                )
+            _, pdf_filename = await render_resume_pdf(
+                name, email, phone, linkedin_link, location, job_description, resume_text,
+                section_concurrency, progress=emit, use_cache=use_cache,
+                generation_mode=generation_mode, template=template
+            )
+            events.put_nowait(("done", {
+                "session_id": details.get("session_id"),
+                "filename": pdf_filename,
+                "resume_url": f"/resumes/{quote(pdf_filename)}",
+                "latex_passes": details.get("latex_passes", 0),
+                "prompt_tokens": details.get("prompt_tokens", 0),
+            }))
+        except Exception as e:
+            logger.exception("Failed to generate streamed resume:")
+            if isinstance(e, HTTPException):
+                events.put_nowait(("error", {"status": e.status_code, "detail": e.detail}))
+            else:
+                events.put_nowait(("error", {"status": 500, "detail": f"Internal server error: {str(e)}"}))
+        finally:
+            events.put_nowait(None)
+
+    def discard_upload(_):
+        # Covers a task cancelled before it started running
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Started here rather than in the stream, which never runs if the client is already gone
+    task = asyncio.create_task(run())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    task.add_done_callback(discard_upload)
+
+    async def stream_events():
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield format_sse(*item)
+        finally:
+            # Client went away: stop generating for it
+            if not task.done():
+                logger.info(f"Client disconnected from the resume stream for {log_pii(name)}")
+                task.cancel()
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Return the per-section LaTeX of a generation session."""
+    session = load_session(session_id)
+    return {
+        "session_id": session["session_id"],
+        "sections": [{"name": name, "latex": latex} for name, latex in session["sections"].items()],
+        "available_sections": [section["name"] for section in RESUME_SECTIONS],
+        "template": session.get("template", DEFAULT_TEMPLATE),
+        "created_at": session["created_at"],
+        "updated_at": session["updated_at"],
+    }
+
+
+@app.post("/sessions/{session_id}/sections", response_class=FileResponse)
+async def update_session_section(
+    session_id: str,
+    section: str = Form(...),
+    latex: Optional[str] = Form(None),
+    output_format: str = Form("pdf")
+):
+    """
+    Regenerate one section of an earlier resume, or replace it with user-edited
+    LaTeX, then recompile that resume. The other sections are reused as they are.
+    With a preview output_format nothing is compiled.
+    """
+    if section not in {s["name"] for s in RESUME_SECTIONS}:
+        raise HTTPException(status_code=400, detail=f"Unknown section '{section}'")
+    output_format = check_output_format(output_format)
+
+    session_path(session_id)  # reject malformed ids before creating a lock for them
+    lock = session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        session = load_session(session_id)
+        usage = {}
+        if latex is not None:
+            content, lint_issues = lint_latex_section(clean_section_output(latex))
+            if lint_issues:
+                raise HTTPException(status_code=400, detail=f"Malformed LaTeX: {'; '.join(lint_issues)}")
+        else:
+            logger.info(f"Regenerating section {section} for session {session_id}")
+            usage_token = llm_usage.set(usage)
+            GENERATIONS_IN_FLIGHT.inc()
+            try:
+                # Skip the cache: the cached version is the one being replaced
+                content = await generate_section(
+                    section, session["job_description"], session["resume_text"],
+                    use_cache=False, profile=session["profile"]
+                )
+            finally:
+                llm_usage.reset(usage_token)
+                GENERATIONS_IN_FLIGHT.dec()
+            if content == generate_fallback_section(section):
+                raise HTTPException(status_code=502, detail="Section could not be regenerated, the previous version was kept")
+
+        session["sections"] = dict(session["sections"], **{section: content})
+        headers = {"X-Prompt-Tokens": str(usage.get("prompt_tokens", 0)), "X-Session-Id": session["session_id"]}
+        if output_format != "pdf":
+            session["updated_at"] = time.time()
+            save_session(session)
+            return preview_response(session, output_format, headers)
+
+        try:
+            pdf_path, latex_passes = await compile_session(session)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception(f"Failed to recompile session {session_id}:")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+        # Only keep the new section once the resume compiles with it
+        session["updated_at"] = time.time()
+        save_session(session)
+
+    return FileResponse(
+        path=pdf_path,
+        filename=session["pdf_filename"],
+        media_type="application/pdf",
+        headers={"X-LaTeX-Passes": str(latex_passes), **headers}
+    )
+
+
+@app.get("/sessions/{session_id}/preview")
+async def get_session_preview(session_id: str, format: str = "html"):
+    """Render a session's sections to HTML or structured JSON without compiling."""
+    format = check_output_format(format)
+    if format == "pdf":
+        raise HTTPException(status_code=400, detail="Use /sessions/{session_id}/pdf for the PDF")
+    session = load_session(session_id)
+    return preview_response(session, format, {"X-Session-Id": session["session_id"]})
+
+
+@app.get("/sessions/{session_id}/pdf", response_class=FileResponse)
+async def get_session_pdf(session_id: str, request: Request):
+    """Compile a session's current sections on demand, reusing the PDF when it is up to date."""
+    session_path(session_id)
+    lock = session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        session = load_session(session_id)
+        pdf_path = os.path.join(OUTPUT_DIR, session["pdf_filename"])
+        latex_passes = 0
+        if not os.path.exists(pdf_path) or os.path.getmtime(pdf_path) < session["updated_at"]:
+            pdf_path, latex_passes = await compile_session(session)
+    return pdf_file_response(request, pdf_path, session["pdf_filename"], {
+        "X-LaTeX-Passes": str(latex_passes), "X-Session-Id": session["session_id"]
+    })
+
+
+@app.get("/resumes/{filename}", response_class=FileResponse)
+async def get_generated_resume(filename: str, request: Request):
+    """Re-download a previously generated resume without generating it again."""
+    if filename != os.path.basename(filename) or not filename.endswith(".pdf"):
+        raise HTTPException(status_code=404, detail="Resume not found, it may have expired")
+    return pdf_file_response(request, os.path.join(OUTPUT_DIR, filename), filename)
+
+
+# Batch mode: one resume, many job descriptions
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "20"))
+# Resumes generated at once across all batch requests
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", "3")))
+
+batch_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_batch_semaphore() -> asyncio.Semaphore:
+    global batch_semaphore
+    if batch_semaphore is None:
+        batch_semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    return batch_semaphore
+
+
+class ZipStreamBuffer:
+    """Write-only sink for zipfile that hands out the bytes written so far."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.buffer.extend(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+@app.post("/generate-resume/batch")
+async def generate_resume_batch(
+    name: str = Form(...),
+    email: str = Form(...),
+    phone: str = Form(...),
+    linkedin_link: str = Form(...),
+    location: str = Form(...),
+    job_descriptions: List[str] = Form(...),
+    resume_file: UploadFile = File(...),
+    section_concurrency: Optional[int] = Form(None),
+    use_cache: bool = Form(True),
+    generation_mode: Optional[str] = Form(None),
+    template: str = Form(DEFAULT_TEMPLATE)
+):
+    """
+    Tailor one resume to several job descriptions. The resume is extracted once and
+    the PDFs are streamed back in a zip as each one finishes; a manifest.json at the
+    end of the archive records the outcome of every item.
+    """
+    job_descriptions = [jd for jd in job_descriptions if jd.strip()]
+    if not job_descriptions:
+        raise HTTPException(status_code=400, detail="At least one job description is required")
+    if len(job_descriptions) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_MAX_ITEMS} job descriptions")
+    check_generation_mode(generation_mode)
+    template = check_template(template)
+
+    logger.info(f"Processing batch of {len(job_descriptions)} resumes for {log_pii(name)}")
+    # Inherited by the item tasks: batch LLM calls yield to interactive ones
+    llm_priority.set("batch")
+    tmp_path = await save_upload(resume_file)
+    try:
+        resume_text = await extract_text_from_file(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+    async def generate_item(index: int, job_description: str) -> dict:
+        async with get_batch_semaphore():
+            details = {}
+            try:
+                pdf_path, pdf_filename = await render_resume_pdf(
+                    name, email, phone, linkedin_link, location, job_description, resume_text,
+                    section_concurrency, progress=lambda stage, **d: details.update(d),
+                    use_cache=use_cache, generation_mode=generation_mode, template=template
+                )
+                return {"index": index, "status": "completed", "path": pdf_path,
+                        "filename": f"{index + 1:02d}_{pdf_filename}", "session_id": details.get("session_id")}
+            except Exception as e:
+                logger.exception(f"Batch item {index + 1} failed:")
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                return {"index": index, "status": "failed", "error": error}
+
+    async def stream_zip():
+        tasks = [asyncio.create_task(generate_item(i, jd)) for i, jd in enumerate(job_descriptions)]
+        sink = ZipStreamBuffer()
+        manifest = []
+        try:
+            with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+                for next_done in asyncio.as_completed(tasks):
+                    item = await next_done
+                    if item["status"] == "completed":
+                        with open(item.pop("path"), "rb") as f:
+                            archive.writestr(item["filename"], f.read())
+                    item["job_description"] = job_descriptions[item["index"]][:200]
+                    manifest.append(item)
+                    yield sink.drain()
+                manifest.sort(key=lambda entry: entry["index"])
+                archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+            yield sink.drain()
+        finally:
+            # Client went away or the archive failed: stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        stream_zip(),
+        media_type="application/zip",
+        headers={"Content-Disposition": attachment_disposition(f"{name}_resumes.zip")}
+    )
+
+
+# Job mode: submit returns immediately, a bounded worker pool drains the queue.
+# The queue and its limit are per web worker; only the status records in JOB_DIR are shared.
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "2")))
+JOB_QUEUE_SIZE = max(1, int(os.getenv("JOB_QUEUE_SIZE", "20")))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+# Job status records, readable by every web worker whichever one runs the job
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(OUTPUT_DIR, "jobs"))
+JOB_PRUNE_INTERVAL = 300
+
+jobs: Dict[str, dict] = {}
+job_queue: Optional[asyncio.Queue] = None
+queued_job_ids: Deque[str] = deque()
+job_workers: List[asyncio.Task] = []
+jobs_pruned_at = 0.0
+# Jobs are numbered in queue order; a queued job's position is its number minus the jobs dequeued
+job_sequence = itertools.count(1)
+jobs_dequeued = 0
+# Record writes waiting for a thread, latest (path, content) per record, and the task writing each record
+pending_job_records: Dict[str, Tuple[str, str]] = {}
+job_record_writers: Dict[str, asyncio.Task] = {}
+
+
+def get_job_queue() -> asyncio.Queue:
+    global job_queue
+    if job_queue is None:
+        job_queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+    return job_queue
+
+
+def job_status_payload(job: dict) -> dict:
+    """Public view of a job record for the status endpoint."""
+    payload = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "queue_depth": len(queued_job_ids),
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    if job["status"] == "queued":
+        try:
+            payload["position"] = queued_job_ids.index(job["job_id"]) + 1
+        except ValueError:
+            payload["position"] = None
+    if job["status"] == "completed":
+        payload["result_url"] = f"/jobs/{job['job_id']}/result"
+    if job["status"] == "failed":
+        payload["error"] = job["error"]
+    return payload
+
+
+def job_path(job_id: str) -> str:
+    try:
+        job_id = str(uuid.UUID(job_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return os.path.join(JOB_DIR, f"{job_id}.json")
+
+
+def job_queue_record_path() -> str:
+    """This web worker's queue progress, from which other workers derive queue positions."""
+    return os.path.join(JOB_DIR, f"queue-{os.getpid()}.json")
+
+
+def write_job_record(path: str, content: str):
+    os.makedirs(JOB_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+async def flush_job_record(key: str):
+    try:
+        while key in pending_job_records:
+            path, content = pending_job_records.pop(key)
+            try:
+                await asyncio.to_thread(write_job_record, path, content)
+            except OSError as e:
+                logger.warning(f"Could not write job record {path}: {e}")
+    finally:
+        del job_record_writers[key]
+
+
+def schedule_job_record(key: str, path: str, content: str) -> asyncio.Task:
+    """
+    Write a record in a thread. Writes of one record run one at a time and only the
+    latest content is written, so bursts of progress updates collapse into one.
+    """
+    pending_job_records[key] = (path, content)
+    if key not in job_record_writers:
+        job_record_writers[key] = asyncio.create_task(flush_job_record(key))
+    return job_record_writers[key]
+
+
+def publish_job(job: dict) -> asyncio.Task:
+    """Write a job's status and result to JOB_DIR for the other web workers."""
+    content = json.dumps({
+        **job_status_payload(job), "result": job["result"],
+        "sequence": job["sequence"], "queue_record": os.path.basename(job_queue_record_path())
+    }, ensure_ascii=False)
+    return schedule_job_record(job["job_id"], job_path(job["job_id"]), content)
+
+
+def publish_job_queue() -> asyncio.Task:
+    content = json.dumps({"dequeued": jobs_dequeued, "queue_depth": len(queued_job_ids)})
+    return schedule_job_record("queue", job_queue_record_path(), content)
+
+
+def load_job(job_id: str) -> dict:
+    """Status payload plus result of a job, whichever web worker runs it."""
+    job = jobs.get(job_id)
+    if job:
+        return {**job_status_payload(job), "result": job["result"]}
+    try:
+        with open(job_path(job_id), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if record["finished_at"] and time.time() - record["finished_at"] > JOB_RESULT_TTL:
+        raise HTTPException(status_code=404, detail="Job not found")
+    sequence, queue_record = record.pop("sequence"), record.pop("queue_record")
+    if record["status"] == "queued":
+        # Positions move up as the owning worker dequeues, without rewriting every queued record
+        try:
+            with open(os.path.join(JOB_DIR, queue_record), "r", encoding="utf-8") as f:
+                queue = json.load(f)
+            record["position"] = max(1, sequence - queue["dequeued"])
+            record["queue_depth"] = queue["queue_depth"]
+        except (FileNotFoundError, ValueError):
+            pass
+    return record
+
+
+def remove_job_record(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_expired_jobs():
+    """
+    Forget finished jobs older than JOB_RESULT_TTL. Records left in JOB_DIR by a
+    worker that exited are removed once not updated for as long.
+    """
+    global jobs_pruned_at
+    now = time.time()
+    expired = [
+        job_id for job_id, job in jobs.items()
+        if job["finished_at"] and now - job["finished_at"] > JOB_RESULT_TTL
+    ]
+    for job_id in expired:
+        jobs.pop(job_id, None)
+        remove_job_record(job_path(job_id))
+
+    if now - jobs_pruned_at < JOB_PRUNE_INTERVAL or not os.path.isdir(JOB_DIR):
+        return
+    jobs_pruned_at = now
+    for entry in os.scandir(JOB_DIR):
+        try:
+            stale = now - entry.stat().st_mtime > JOB_RESULT_TTL
+        except FileNotFoundError:
+            continue
+        if stale:
+            remove_job_record(entry.path)
+
+
+async def run_job(job: dict):
+    def update_progress(stage: str, **details):
+        job["stage"] = stage
+        job["progress"].update(details)
+        publish_job(job)
+
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    publish_job(job)
+    params = job["params"]
+    llm_client.set(job["client"])
+    llm_priority.set("background")
+    timings: Dict[str, float] = {}
+    request_timings.set(timings)
+    try:
+        pdf_path, pdf_filename = await build_resume_pdf(
+            params["name"], params["email"], params["phone"], params["linkedin_link"],
+            params["location"], params["job_description"], job["upload_path"],
+            params["section_concurrency"], progress=update_progress,
+            use_cache=params["use_cache"],
+            generation_mode=params["generation_mode"],
+            template=params["template"]
+        )
+        job["result"] = {"path": pdf_path, "filename": pdf_filename}
+        job["status"] = "completed"
+        job["stage"] = "done"
+    except Exception as e:
+        logger.exception(f"Job {job['job_id']} failed:")
+        job["status"] = "failed"
+        job["error"] = str(e.detail) if isinstance(e, HTTPException) else str(e)
+    finally:
+        job["finished_at"] = time.time()
+        publish_job(job)
+        if os.path.exists(job["upload_path"]):
+            os.remove(job["upload_path"])
+        log_record("job", {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "queued_ms": round((job["started_at"] - job["created_at"]) * 1000, 1),
+            "duration_ms": round((job["finished_at"] - job["started_at"]) * 1000, 1),
+        }, timings, failed=job["status"] != "completed")
+
+
+async def job_worker(worker_id: int):
+    global jobs_dequeued
+    queue = get_job_queue()
+    while True:
+        job_id = await queue.get()
+        try:
+            if job_id in queued_job_ids:
+                queued_job_ids.remove(job_id)
+                jobs_dequeued += 1
+                publish_job_queue()
+            job = jobs.get(job_id)
+            if job:
+                logger.info(f"Worker {worker_id} picked up job {job_id}")
+                await run_job(job)
+            prune_expired_jobs()
+        finally:
+            queue.task_done()
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    get_job_queue()
+    for worker_id in range(JOB_WORKERS):
+        job_workers.append(asyncio.create_task(job_worker(worker_id)))
+    logger.info(f"Started {JOB_WORKERS} job workers (queue size {JOB_QUEUE_SIZE})")
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in job_workers:
+        task.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    job_workers.clear()
+    await asyncio.gather(*job_record_writers.values(), return_exceptions=True)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    name: str = Form(...),
+    email: str = Form(...),
+    phone: str = Form(...),
+    linkedin_link: str = Form(...),
+    location: str = Form(...),
+    job_description: str = Form(...),
+    resume_file: UploadFile = File(...),
+    section_concurrency: Optional[int] = Form(None),
+    use_cache: bool = Form(True),
+    generation_mode: Optional[str] = Form(None),
+    template: str = Form(DEFAULT_TEMPLATE)
+):
+    """Queue a resume generation and return a job id immediately."""
+    check_generation_mode(generation_mode)
+    template = check_template(template)
+    queue = get_job_queue()
+    if queue.full():
+        raise HTTPException(status_code=429, detail="Job queue is full, please retry later")
+
+    tmp_path = await save_upload(resume_file)
+
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "stage": "queued",
+        "progress": {},
+        "params": {
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "linkedin_link": linkedin_link,
+            "location": location,
+            "job_description": job_description,
+            "section_concurrency": section_concurrency,
+            "use_cache": use_cache,
+            "generation_mode": generation_mode,
+            "template": template,
+        },
+        "upload_path": tmp_path,
+        "client": llm_client.get(),
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+    try:
+        queue.put_nowait(job_id)
+    except asyncio.QueueFull:
         os.remove(tmp_path)
+        raise HTTPException(status_code=429, detail="Job queue is full, please retry later")
+
+    job["sequence"] = next(job_sequence)
+    jobs[job_id] = job
+    queued_job_ids.append(job_id)
+    # Written before answering, so any worker can be polled for the job right away
+    await asyncio.gather(publish_job(job), publish_job_queue())
+    logger.info(f"Queued job {job_id} for {log_pii(name)} (position {len(queued_job_ids)})")
+
+    payload = job_status_payload(job)
+    payload["status_url"] = f"/jobs/{job_id}"
+    return JSONResponse(status_code=202, content=payload)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Return status, stage progress and queue position of a job."""
+    record = load_job(job_id)
+    record.pop("result")
+    return record
+
+
+@app.get("/jobs/{job_id}/result", response_class=FileResponse)
+async def get_job_result(job_id: str, request: Request):
+    """Download the PDF of a completed job."""
+    job = load_job(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is not finished (status: {job['status']})")
+    result = job["result"]
+    return pdf_file_response(request, result["path"], result["filename"])
+
+
+@app.get("/templates")
+async def list_templates():
+    """List the templates that can be passed as `template` when generating."""
+    return {"default": DEFAULT_TEMPLATE, "templates": template_registry.names()}
 
 
 @app.get("/health")
@@ -584,5 +4148,26 @@ async def health_check():
     return {
         "status": "healthy",
         "ai_provider": AI_PROVIDER,
-        "model": GROQ_MODEL if AI_PROVIDER == "groq" else OPENROUTER_MODEL
+        "model": active_model(),
+        "providers": {name: state.snapshot() for name, state in provider_states.items()},
+        "job_queue_depth": len(queued_job_ids),
+        "job_queue_capacity": JOB_QUEUE_SIZE,
+        "extraction_cache": extraction_cache.snapshot(),
+        "section_cache": section_cache.snapshot(),
+        "storage": resume_storage.snapshot(),
+        "coalescing": generation_flights.snapshot(),
+        "llm_scheduler": llm_scheduler.snapshot(),
+        "logging": {"queue_depth": log_queue_handler.queue.qsize(), "dropped": log_queue_handler.dropped}
     }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for extraction, section generation, LLM calls and pdflatex passes."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        data = generate_latest(registry)
+    else:
+        data = generate_latest()
+    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,49 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# The app keeps its log, generated resumes and caches relative to the working directory
+WORK_DIR = tempfile.mkdtemp(prefix="resume_tests_")
+shutil.copy(os.path.join(SERVER_DIR, "template.tex"), WORK_DIR)
+os.chdir(WORK_DIR)
+os.environ["LOG_FILE"] = os.path.join(WORK_DIR, "api.log")
+os.environ["SECTION_CACHE_BACKEND"] = "memory"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def session_id():
+    """A saved generation session with one section, for the /sessions endpoints."""
+    import resume_generator_api as api
+
+    session_id = str(uuid.uuid4())
+    api.save_session({
+        "session_id": session_id,
+        "contact": {"name": "Jane Doe", "email": "", "phone": "", "linkedin_link": "", "location": ""},
+        "job_description": "", "resume_text": "", "profile": None,
+        "sections": {"Projects": "\\section{Projects}\nJob Tracker"},
+        "pdf_filename": f"Jane Doe_{session_id}.pdf",
+        "created_at": time.time(), "updated_at": time.time(),
+    })
+    return session_id
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import resume_generator_api as api
+
+    return TestClient(api.app)
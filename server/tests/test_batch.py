@@ -0,0 +1,48 @@
+import io
+import json
+import zipfile
+
+import resume_generator_api as api
+
+FORM = {
+    "name": "Jane Doe", "email": "jane@example.com", "phone": "555", "linkedin_link": "https://linkedin.com/in/jane",
+    "location": "Remote",
+}
+RESUME = {"resume_file": ("resume.pdf", b"%PDF-1.4\n", "application/pdf")}
+
+
+def test_batch_streams_a_zip_with_a_manifest(client, monkeypatch, tmp_path):
+    async def extract(path):
+        return "Resume text"
+
+    async def render(name, email, phone, linkedin, location, job_description, resume_text, *args, **kwargs):
+        if job_description == "broken":
+            raise RuntimeError("AI call failed")
+        pdf = tmp_path / f"{job_description}.pdf"
+        pdf.write_bytes(f"%PDF {job_description}".encode())
+        return str(pdf), f"Jane_Doe_{job_description}.pdf"
+
+    monkeypatch.setattr(api, "extract_text_from_file", extract)
+    monkeypatch.setattr(api, "render_resume_pdf", render)
+    response = client.post("/generate-resume/batch", files=RESUME,
+                           data={**FORM, "job_descriptions": ["backend", "broken", "frontend"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.read("01_Jane_Doe_backend.pdf") == b"%PDF backend"
+    assert archive.read("03_Jane_Doe_frontend.pdf") == b"%PDF frontend"
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [item["status"] for item in manifest] == ["completed", "failed", "completed"]
+    assert manifest[1]["error"] == "AI call failed"
+
+
+def test_batch_rejects_empty_and_oversized_requests(client, monkeypatch):
+    response = client.post("/generate-resume/batch", files=RESUME, data={**FORM, "job_descriptions": ["  "]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "At least one job description is required"
+
+    monkeypatch.setattr(api, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/generate-resume/batch", files=RESUME, data={**FORM, "job_descriptions": ["a", "b", "c"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "A batch can contain at most 2 job descriptions"
@@ -0,0 +1,81 @@
+import os
+from urllib.parse import unquote
+
+import pytest
+
+from resume_generator_api import attachment_disposition
+
+PDF_BYTES = b"%PDF-1.4\n" + bytes(range(31))
+
+
+@pytest.mark.parametrize("filename", ["王小明_resumes.zip", 'Jane "JD" Doe_resumes.zip', "Jane\r\nX-Evil: 1.zip"])
+def test_attachment_disposition_is_latin1_with_utf8_name(filename):
+    header = attachment_disposition(filename)
+    header.encode("latin-1")
+    assert "\r" not in header and "\n" not in header
+    fallback = header.split('filename="', 1)[1].split('";', 1)[0]
+    assert '"' not in fallback
+    assert unquote(header.split("filename*=UTF-8''", 1)[1]) == filename
+
+
+@pytest.fixture
+def stored_pdf():
+    import resume_generator_api as api
+
+    filename = "Range Test.pdf"
+    with open(os.path.join(api.OUTPUT_DIR, filename), "wb") as f:
+        f.write(PDF_BYTES)
+    return f"/resumes/{filename}"
+
+
+@pytest.mark.parametrize("range_header, content_range, body", [
+    ("bytes=0-9", "bytes 0-9/40", PDF_BYTES[:10]),
+    ("bytes=30-", "bytes 30-39/40", PDF_BYTES[30:]),
+    ("bytes=-5", "bytes 35-39/40", PDF_BYTES[-5:]),
+    ("bytes=35-100", "bytes 35-39/40", PDF_BYTES[35:]),
+])
+def test_single_range_is_served_partially(client, stored_pdf, range_header, content_range, body):
+    response = client.get(stored_pdf, headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == content_range
+    assert response.content == body
+
+
+@pytest.mark.parametrize("range_header", ["bytes=0-1,5-9", "bytes=9-3", "bytes=-", "items=0-9", "bytes=abc"])
+def test_malformed_or_multiple_ranges_get_the_whole_file(client, stored_pdf, range_header):
+    response = client.get(stored_pdf, headers={"Range": range_header})
+    assert response.status_code == 200
+    assert response.content == PDF_BYTES
+
+
+@pytest.mark.parametrize("range_header", ["bytes=40-", "bytes=100-200", "bytes=-0"])
+def test_unsatisfiable_range_is_rejected(client, stored_pdf, range_header):
+    response = client.get(stored_pdf, headers={"Range": range_header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */40"
+
+
+def test_etag_answers_conditional_get_with_304(client, stored_pdf):
+    etag = client.get(stored_pdf).headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert client.get(stored_pdf, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(stored_pdf, headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get(stored_pdf, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_changes_with_the_content(client, stored_pdf):
+    import resume_generator_api as api
+
+    etag = client.get(stored_pdf).headers["etag"]
+    with open(os.path.join(api.OUTPUT_DIR, "Range Test.pdf"), "ab") as f:
+        f.write(b"%%EOF\n")
+    assert client.get(stored_pdf).headers["etag"] != etag
+
+
+def test_if_range_serves_the_range_only_for_the_current_etag(client, stored_pdf):
+    etag = client.get(stored_pdf).headers["etag"]
+    response = client.get(stored_pdf, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    response = client.get(stored_pdf, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PDF_BYTES
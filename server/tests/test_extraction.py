@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import resume_generator_api as api
+
+
+class CountingPool(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return super().submit(fn, *args, **kwargs)
+
+
+def blank_pdf(path: str, pages: int) -> str:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = CountingPool()
+    monkeypatch.setattr(api, "get_extraction_pool", lambda: pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_short_pdf_is_parsed_in_one_task(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "PDF_PAGES_PER_TASK", 4)
+    path = blank_pdf(os.path.join(tmp_path, "short.pdf"), 3)
+    assert await api.extract_pdf_text(path) == "\n\n"
+    assert pool.calls == ["open_pdf_pages"]
+
+
+@pytest.mark.anyio
+async def test_long_pdf_is_split_into_page_ranges(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "PDF_PAGES_PER_TASK", 2)
+    path = blank_pdf(os.path.join(tmp_path, "long.pdf"), 5)
+    assert await api.extract_pdf_text(path) == "\n\n\n\n"
+    assert pool.calls == ["open_pdf_pages"] + ["extract_pdf_pages"] * 3
+
+
+@pytest.mark.anyio
+async def test_extraction_cache_disk_tier_runs_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    to_thread = api.asyncio.to_thread
+
+    async def recording_to_thread(fn, *args):
+        threads.append(fn.__name__)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(api.asyncio, "to_thread", recording_to_thread)
+    cache = api.ExtractionCache(0, str(tmp_path), 1024 * 1024)
+    await cache.put("abc_pdf", "Jane Doe")
+    assert await cache.get("abc_pdf") == "Jane Doe"
+    assert await cache.get("missing_pdf") is None
+    assert threads == ["write_disk", "read_disk", "read_disk"]
+    assert cache.snapshot()["disk_hits"] == 1
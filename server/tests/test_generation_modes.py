@@ -0,0 +1,86 @@
+import pytest
+from fastapi import HTTPException
+
+import resume_generator_api as api
+
+SINGLE_CALL_OUTPUT = """Here are the sections.
+%%% SECTION: Professional Summary %%%
+```latex
+\\section{Professional Summary}
+Backend engineer with 5 years of Go.
+Ships reliable services.
+```
+%%% SECTION: Education %%%
+BSc Computer Science, no section header
+%%% SECTION: Experience %%%
+\\section{Experience}
+\\begin{itemize}
+\\item Built APIs
+\\end{itemize}
+"""
+# Passes the validation of every section, so no call is retried
+INDIVIDUAL_SECTION = (
+    "\\section{Professional Summary}\n\\subsection{Technical Skills}\n\\section{Education}\n"
+    "\\section{Experience}\\begin{itemize}\\item Built APIs\\end{itemize}"
+)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    calls = []
+
+    async def call_ai_api(system_prompt, user_prompt, max_tokens=1500):
+        if system_prompt == api.MULTI_SECTION_SYSTEM_PROMPT:
+            calls.append("multi")
+            if isinstance(llm_reply[0], Exception):
+                raise llm_reply[0]
+            return llm_reply[0]
+        calls.append("single")
+        return INDIVIDUAL_SECTION
+
+    llm_reply = [SINGLE_CALL_OUTPUT]
+    monkeypatch.setattr(api, "call_ai_api", call_ai_api)
+    monkeypatch.setattr(api, "PROFILE_EXTRACTION", False)
+    monkeypatch.setattr(api, "section_cache", api.SectionCache(api.MemorySectionCacheBackend(100), 3600))
+    return calls, llm_reply
+
+
+def test_output_is_split_on_section_delimiters():
+    sections = api.split_multi_section_output(SINGLE_CALL_OUTPUT)
+    assert list(sections) == ["Professional Summary", "Education", "Experience"]
+    assert sections["Professional Summary"].startswith("\\section{Professional Summary}\nBackend engineer")
+    assert api.split_multi_section_output("no delimiters at all") == {}
+
+
+@pytest.mark.anyio
+async def test_single_call_keeps_only_valid_sections(llm):
+    calls, _ = llm
+    names = ["Professional Summary", "Technical Skills", "Education", "Experience"]
+    sections = await api.generate_sections_single_call(names, "Go job", "Go resume")
+    assert list(sections) == ["Professional Summary", "Experience"]
+    assert calls == ["multi"]
+
+
+@pytest.mark.anyio
+async def test_single_mode_requests_missing_and_invalid_sections_individually(llm):
+    calls, _ = llm
+    sections, _ = await api.generate_resume_sections("Go job", "Go resume", generation_mode="single")
+    assert set(sections) == {"Professional Summary", "Technical Skills", "Education", "Experience"}
+    assert calls.count("multi") == 1
+    assert calls.count("single") == 2  # Technical Skills was missing, Education invalid
+
+
+@pytest.mark.anyio
+async def test_failed_single_call_falls_back_to_one_call_per_section(llm):
+    calls, reply = llm
+    reply[0] = RuntimeError("provider down")
+    sections, _ = await api.generate_resume_sections("Go job", "Go resume", generation_mode="single")
+    assert len(sections) == 4
+    assert calls.count("single") == 4
+
+
+def test_unknown_generation_mode_is_rejected():
+    api.check_generation_mode("SINGLE")
+    with pytest.raises(HTTPException) as error:
+        api.check_generation_mode("batch")
+    assert error.value.status_code == 400
@@ -0,0 +1,60 @@
+import itertools
+import json
+from collections import deque
+
+import pytest
+
+import resume_generator_api as api
+
+FORM = {
+    "name": "Jane Doe", "email": "jane@example.com", "phone": "555", "linkedin_link": "https://linkedin.com/in/jane",
+    "location": "Remote", "job_description": "Backend engineer",
+}
+
+
+@pytest.fixture
+def job_state(monkeypatch, tmp_path):
+    """A fresh, idle job queue whose records go to a temporary JOB_DIR."""
+    monkeypatch.setattr(api, "JOB_DIR", str(tmp_path))
+    monkeypatch.setattr(api, "jobs", {})
+    monkeypatch.setattr(api, "job_queue", None)
+    monkeypatch.setattr(api, "queued_job_ids", deque())
+    monkeypatch.setattr(api, "job_sequence", itertools.count(1))
+    monkeypatch.setattr(api, "jobs_dequeued", 0)
+    return tmp_path
+
+
+def submit(client) -> dict:
+    response = client.post("/jobs", data=FORM, files={"resume_file": ("resume.pdf", b"%PDF-1.4\n", "application/pdf")})
+    assert response.status_code == 202
+    return response.json()
+
+
+def test_queued_jobs_report_their_position(client, job_state):
+    positions = [submit(client)["position"] for _ in range(3)]
+    assert positions == [1, 2, 3]
+
+
+def test_other_workers_derive_positions_from_the_queue_record(client, job_state, monkeypatch):
+    job_ids = [submit(client)["job_id"] for _ in range(3)]
+    record = json.loads((job_state / f"{job_ids[2]}.json").read_text())
+    assert record["position"] == 3
+
+    # The owning worker dequeued one job; only its queue record was rewritten
+    api.write_job_record(api.job_queue_record_path(), json.dumps({"dequeued": 1, "queue_depth": 2}))
+    monkeypatch.setattr(api, "jobs", {})
+    status = client.get(f"/jobs/{job_ids[2]}").json()
+    assert (status["status"], status["position"], status["queue_depth"]) == ("queued", 2, 2)
+    assert "sequence" not in status and "queue_record" not in status
+
+
+def test_full_queue_answers_429(client, job_state, monkeypatch):
+    monkeypatch.setattr(api, "JOB_QUEUE_SIZE", 1)
+    submit(client)
+    response = client.post("/jobs", data=FORM, files={"resume_file": ("resume.pdf", b"%PDF-1.4\n", "application/pdf")})
+    assert response.status_code == 429
+
+
+def test_unknown_job_is_404(client, job_state):
+    assert client.get("/jobs/not-a-job").status_code == 404
+    assert client.get("/jobs/00000000-0000-0000-0000-000000000000").status_code == 404
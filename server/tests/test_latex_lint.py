@@ -0,0 +1,88 @@
+import pytest
+
+from resume_generator_api import lint_latex_section
+
+
+@pytest.mark.parametrize("section", [
+    "\\section{Projects}\\input{/etc/passwd}",
+    "\\section{Projects}\\include{secrets}",
+    "\\section{Projects}\\immediate\\write18{id}",
+    "\\section{Projects}\\openin1=/etc/hosts \\read1 to \\x",
+    "\\section{Projects}\\catcode`\\^^5c=12",
+    "\\section{Projects}\\def\\x{\\input}",
+    "\\section{Projects}\\csname input\\endcsname{/etc/passwd}",
+    "\\section{Projects}\\href{^^5cinput{/etc/passwd}}{x}",
+])
+def test_file_and_macro_primitives_are_rejected(section):
+    content, issues = lint_latex_section(section)
+    assert issues
+    assert "\\input" not in content and "^^" not in content and "\\write" not in content
+
+
+def test_session_edit_with_file_access_is_rejected(client, session_id):
+    response = client.post(f"/sessions/{session_id}/sections", data={
+        "section": "Projects", "latex": "\\section{Projects}\\input{/etc/passwd}",
+    })
+    assert response.status_code == 400
+    assert "\\input is not allowed" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("section, expected", [
+    ("Cost 50% & 3# of $5 at R_D^2", "Cost 50\\% \\& 3\\# of \\$5 at R\\_D\\^{}2"),
+    ("Already \\% \\& \\_ escaped", "Already \\% \\& \\_ escaped"),
+])
+def test_specials_are_escaped_silently(section, expected):
+    assert lint_latex_section(section) == (expected, [])
+
+
+@pytest.mark.parametrize("section, expected, issue", [
+    ("\\textbf{bold", "\\textbf{bold}", "1 unclosed brace(s)"),
+    ("text} more", "text more", "unmatched }"),
+    ("\\begin{itemize}\n\\item one", "\\begin{itemize}\n\\item one\n\\end{itemize}", "unclosed environment itemize"),
+    ("\\begin{itemize}\\begin{enumerate}\\item a\\end{itemize}",
+     "\\begin{itemize}\\begin{enumerate}\\item a\\end{enumerate}\\end{itemize}", "unclosed environment enumerate"),
+    ("\\end{itemize} x", " x", "\\end{itemize} without \\begin"),
+    ("\\item stray", "\\textbullet{} stray", "\\item outside a list"),
+])
+def test_structure_is_repaired_and_reported(section, expected, issue):
+    content, issues = lint_latex_section(section)
+    assert content == expected
+    assert issue in issues
+
+
+def test_brace_closed_inside_an_environment_stays_inside_it():
+    content, issues = lint_latex_section("\\textbf{a\\begin{itemize}\\item b}\\end{itemize}")
+    assert content == "\\textbf{a\\begin{itemize}\\item b\\end{itemize}}"
+    assert issues == ["unmatched }", "1 unclosed brace(s)"]
+
+
+@pytest.mark.parametrize("section, expected", [
+    ("\\href{https://x.com/a_b?c=d^e}{my_link}", "\\href{https://x.com/a_b?c=d^e}{my\\_link}"),
+    ("\\url{https://x.com/a_{b}}_c", "\\url{https://x.com/a_{b}}\\_c"),
+])
+def test_url_arguments_keep_underscores_and_carets(section, expected):
+    assert lint_latex_section(section) == (expected, [])
+
+
+@pytest.mark.parametrize("section", [
+    "Cut latency by $\\sim$3x",
+    "Scaled to $10^6$ users with $O(n_1)$ memory",
+    "\\begin{tabular}{ll}\nPython & Go \\\\\n\\end{tabular}",
+])
+def test_inline_math_and_tabular_bodies_are_left_alone(section):
+    assert lint_latex_section(section) == (section, [])
+
+
+@pytest.mark.parametrize("section, expected", [
+    ("Saved $2M and $3M", "Saved \\$2M and \\$3M"),
+    ("Priced $5-$10", "Priced \\$5-\\$10"),
+    ("R&D and $x$ in A_B", "R\\&D and $x$ in A\\_B"),
+])
+def test_dollar_amounts_are_escaped_next_to_math(section, expected):
+    assert lint_latex_section(section) == (expected, [])
+
+
+def test_forbidden_commands_inside_math_are_removed():
+    content, issues = lint_latex_section("$\\input{/etc/passwd}$")
+    assert "\\input" not in content
+    assert issues == ["\\input is not allowed"]
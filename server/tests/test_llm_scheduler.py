@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from resume_generator_api import LLMScheduler
+
+
+@pytest.mark.anyio
+async def test_budget_below_one_request_per_minute_still_admits_calls():
+    # e.g. 20 rpm split across 32 workers
+    scheduler = LLMScheduler(0.5, 0, 5)
+    await asyncio.wait_for(scheduler.acquire(100, "client", "interactive"), 1)
+    scheduler.release()
+    # The next call waits for a whole request to refill at 0.5 per minute
+    assert scheduler.budget_wait(100) == pytest.approx(120, abs=1)
+
+
+async def grant_order(scheduler: LLMScheduler, calls):
+    """Queue (name, client, priority) calls behind a held slot and return the order they are admitted in."""
+    granted = []
+
+    async def call(name, client, priority):
+        await scheduler.acquire(10, client, priority)
+        granted.append(name)
+
+    await scheduler.acquire(10, "holder", "interactive")
+    tasks = [asyncio.create_task(call(*entry)) for entry in calls]
+    await asyncio.sleep(0)
+    for _ in calls:
+        scheduler.release()
+        await asyncio.sleep(0)
+    await asyncio.wait_for(asyncio.gather(*tasks), 1)
+    return granted
+
+
+def test_budgets_refill_with_time_up_to_their_capacity():
+    scheduler = LLMScheduler(60, 6000, 0)
+    scheduler.request_budget, scheduler.token_budget = 0, 0
+    scheduler.refilled_at -= 30
+    scheduler.refill()
+    assert scheduler.request_budget == pytest.approx(30, abs=0.1)
+    assert scheduler.token_budget == pytest.approx(3000, abs=10)
+
+    scheduler.refilled_at -= 600
+    scheduler.refill()
+    assert (scheduler.request_budget, scheduler.token_budget) == (60, 6000)
+
+
+def test_budget_wait_covers_the_scarcer_budget():
+    scheduler = LLMScheduler(60, 600, 0)
+    scheduler.request_budget, scheduler.token_budget = 0.5, 100
+    assert scheduler.budget_wait(100) == pytest.approx(0.5)
+    assert scheduler.budget_wait(400) == pytest.approx(30)
+
+
+@pytest.mark.anyio
+async def test_higher_priorities_are_admitted_first():
+    granted = await grant_order(LLMScheduler(0, 0, 1), [
+        ("batch", "a", "batch"), ("background", "b", "background"), ("interactive", "c", "interactive"),
+    ])
+    assert granted == ["interactive", "background", "batch"]
+
+
+@pytest.mark.anyio
+async def test_clients_take_turns_within_a_priority():
+    granted = await grant_order(LLMScheduler(0, 0, 1), [
+        ("a1", "a", "interactive"), ("a2", "a", "interactive"), ("a3", "a", "interactive"),
+        ("b1", "b", "interactive"), ("b2", "b", "interactive"),
+    ])
+    assert granted == ["a1", "b1", "a2", "b2", "a3"]
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler(0, 0, 1)
+    await scheduler.acquire(10, "holder", "interactive")
+    waiter = asyncio.create_task(scheduler.acquire(10, "a", "interactive"))
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["queued"]["interactive"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.snapshot()["queued"]["interactive"] == 0
+    scheduler.release()
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_call_cancelled_after_admission_gives_its_slot_back():
+    scheduler = LLMScheduler(0, 0, 1)
+    await scheduler.acquire(10, "holder", "interactive")
+    waiter = asyncio.create_task(scheduler.acquire(10, "a", "interactive"))
+    await asyncio.sleep(0)
+    scheduler.release()  # admits the waiter, which is cancelled before it resumes
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.in_flight == 0
+
+
+def test_extra_calls_are_charged_only_while_the_budget_covers_them():
+    scheduler = LLMScheduler(60, 1000, 0)
+    scheduler.request_budget = 1.5
+    assert scheduler.try_charge(400)
+    assert scheduler.request_budget == pytest.approx(0.5, abs=0.01)
+    assert scheduler.token_budget == pytest.approx(600, abs=1)
+    assert not scheduler.try_charge(400)
+
+
+@pytest.mark.anyio
+async def test_hedge_is_skipped_when_the_budget_is_used_up(monkeypatch):
+    import resume_generator_api as api
+
+    calls = []
+
+    async def call_provider(name, system_prompt, user_prompt, max_tokens):
+        calls.append(name)
+        await asyncio.sleep(0.05 if name == "groq" else 0)
+        return name
+
+    async def available_providers():
+        return ["groq", "openrouter"]
+
+    scheduler = LLMScheduler(60, 0, 0)
+    monkeypatch.setattr(api, "llm_scheduler", scheduler)
+    monkeypatch.setattr(api, "call_provider", call_provider)
+    monkeypatch.setattr(api, "available_providers", available_providers)
+    monkeypatch.setattr(api, "HEDGE_AFTER_SECONDS", 0.01)
+    monkeypatch.setitem(api.provider_states, "openrouter", api.ProviderState("openrouter", True))
+
+    scheduler.request_budget = 2
+    assert await api.route_ai_call("system", "prompt") == "openrouter"
+    assert scheduler.request_budget == pytest.approx(1, abs=0.2)
+
+    scheduler.request_budget = 0
+    calls.clear()
+    assert await api.route_ai_call("system", "prompt") == "groq"
+    assert calls == ["groq"]
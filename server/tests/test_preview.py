@@ -0,0 +1,56 @@
+import pytest
+
+import resume_generator_api as api
+
+EXPERIENCE = (
+    "\\section{Experience}\n"
+    "\\textbf{Engineer} | \\textit{Acme} \\hfill 2021 -- Present\n"
+    "\\begin{itemize}[leftmargin=*]\n"
+    "  \\item Cut latency by 45\\% % measured at p99\n"
+    "  \\item Led migrations\n"
+    "  \\begin{enumerate}\n  \\item Kubernetes\n  \\end{enumerate}\n"
+    "\\end{itemize}"
+)
+
+
+@pytest.mark.parametrize("latex, html, text", [
+    ("\\textbf{Python} \\& \\textit{Go}", "<strong>Python</strong> &amp; <em>Go</em>", "Python & Go"),
+    ("\\href{https://x.io/a\\_b}{\\textbf{site}}", '<a href="https://x.io/a_b"><strong>site</strong></a>', "site"),
+    ("2019 -- 2021 \\vspace{2pt}", "2019 \u2013 2021 ", "2019 \u2013 2021"),
+    ("a <b> % comment", "a &lt;b&gt; ", "a <b>"),
+    ("\\unknown{kept}", "kept", "kept"),
+])
+def test_render_latex_inline(latex, html, text):
+    assert api.render_latex_inline(latex) == (html, text)
+
+
+def test_render_preview_orders_sections_and_nests_lists():
+    session = {"sections": {"Experience": EXPERIENCE, "Professional Summary": "\\section{Professional Summary}\nBuilder"}}
+    sections = api.render_preview(session)
+    assert [section["name"] for section in sections] == ["Professional Summary", "Experience"]
+
+    heading, role, bullets = sections[1]["blocks"]
+    assert heading == {"type": "heading", "level": 1, "text": "Experience", "html": "Experience"}
+    assert role["text"] == "Engineer | Acme 2021 \u2013 Present"
+    assert [item["text"] for item in bullets["items"]] == ["Cut latency by 45%", "Led migrations"]
+    nested = bullets["items"][1]["children"][0]
+    assert nested["ordered"] and nested["items"][0]["text"] == "Kubernetes"
+
+
+def test_session_preview_as_html_and_json(client, session_id):
+    response = client.get(f"/sessions/{session_id}/preview")
+    assert response.headers["content-type"].startswith("text/html")
+    assert "<h1>Jane Doe</h1>" in response.text and "<h2>Projects</h2>" in response.text
+
+    data = client.get(f"/sessions/{session_id}/preview", params={"format": "json"}).json()
+    assert data["pdf_url"] == f"/sessions/{session_id}/pdf"
+    assert data["sections"] == [{"name": "Projects", "blocks": [
+        {"type": "heading", "level": 1, "text": "Projects"}, {"type": "paragraph", "text": "Job Tracker"},
+    ]}]
+
+
+def test_preview_rejects_unknown_formats_and_sessions(client, session_id):
+    response = client.get(f"/sessions/{session_id}/preview", params={"format": "xml"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown output_format 'xml', expected one of: pdf, html, json"
+    assert client.get("/sessions/00000000-0000-0000-0000-000000000000/preview").status_code == 404
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import resume_generator_api as api
+
+RESUME = "Jane Doe, engineer at Acme. RESUME-ONLY-MARKER"
+PROFILE = {
+    "job": {"job_title": "Backend Engineer", "keywords": ["Go"], "tools": ["Postgres"]},
+    "candidate": {"skills": ["Go", "SQL"], "roles": [{"title": "Engineer", "company": "Acme"}]},
+}
+# Passes the validation of every section, so no call is retried
+ANY_SECTION = (
+    "\\section{Professional Summary}\n\\subsection{Technical Skills}\n\\section{Education}\n"
+    "\\section{Experience}\\begin{itemize}\\item Built APIs\\end{itemize}"
+)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM: answers the profile call with `llm.profile_reply`, every other call with ANY_SECTION."""
+    class FakeLLM:
+        profile_reply = json.dumps(PROFILE)
+        profile_calls = 0
+        section_prompts = []
+
+    async def call_ai_api(system_prompt, user_prompt, max_tokens=1500):
+        if system_prompt == api.PROFILE_SYSTEM_PROMPT:
+            FakeLLM.profile_calls += 1
+            if isinstance(FakeLLM.profile_reply, Exception):
+                raise FakeLLM.profile_reply
+            return FakeLLM.profile_reply
+        FakeLLM.section_prompts.append(user_prompt)
+        return ANY_SECTION
+
+    monkeypatch.setattr(api, "call_ai_api", call_ai_api)
+    monkeypatch.setattr(api, "section_cache", api.SectionCache(api.MemorySectionCacheBackend(100), 3600))
+    FakeLLM.section_prompts = []
+    return FakeLLM
+
+
+@pytest.mark.parametrize("content", [
+    json.dumps(PROFILE),
+    f"Here is the profile:\n```json\n{json.dumps(PROFILE)}\n```",
+    f"Sure! {json.dumps(PROFILE)} Let me know if you need more.",
+])
+def test_parse_json_object_tolerates_fences_and_prose(content):
+    assert api.parse_json_object(content) == PROFILE
+
+
+@pytest.mark.parametrize("content", ["no json here", "[1, 2]", "{not: valid}"])
+def test_parse_json_object_rejects_non_objects(content):
+    with pytest.raises(ValueError):
+        api.parse_json_object(content)
+
+
+@pytest.mark.anyio
+async def test_profile_is_extracted_once_and_cached(llm):
+    assert await api.extract_profile("Go job", RESUME) == PROFILE
+    assert await api.extract_profile("Go job", RESUME) == PROFILE
+    assert llm.profile_calls == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("reply", [
+    "I could not build a profile.",
+    json.dumps({"job": PROFILE["job"]}),
+    RuntimeError("provider down"),
+])
+async def test_unusable_profile_falls_back_to_none_and_is_not_cached(llm, reply):
+    llm.profile_reply = reply
+    assert await api.extract_profile("Go job", RESUME) is None
+    assert await api.extract_profile("Go job", RESUME) is None
+    assert llm.profile_calls == 2
+
+
+def test_profile_context_keeps_only_the_fields_a_section_needs():
+    job, candidate = api.profile_context("Technical Skills", PROFILE)
+    assert json.loads(job) == {"keywords": ["Go"], "tools": ["Postgres"]}
+    assert json.loads(candidate) == {"skills": ["Go", "SQL"]}
+
+
+@pytest.mark.anyio
+async def test_sections_are_prompted_with_the_profile_instead_of_the_resume(llm, monkeypatch):
+    monkeypatch.setattr(api, "PROFILE_EXTRACTION", True)
+    sections, profile = await api.generate_resume_sections("Go job", RESUME, generation_mode="sections")
+    assert profile == PROFILE
+    assert sections and llm.section_prompts
+    assert not any("RESUME-ONLY-MARKER" in prompt for prompt in llm.section_prompts)
+
+
+@pytest.mark.anyio
+async def test_sections_fall_back_to_full_text_when_profile_extraction_fails(llm, monkeypatch):
+    monkeypatch.setattr(api, "PROFILE_EXTRACTION", True)
+    llm.profile_reply = "not json"
+    sections, profile = await api.generate_resume_sections("Go job", RESUME, generation_mode="sections")
+    assert profile is None
+    assert all("RESUME-ONLY-MARKER" in prompt for prompt in llm.section_prompts)
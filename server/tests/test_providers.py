@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+import resume_generator_api as api
+
+
+def half_open_state(name: str) -> api.ProviderState:
+    state = api.ProviderState(name, True)
+    state.failures = api.CIRCUIT_FAILURE_THRESHOLD
+    state.opened_at = time.monotonic() - api.CIRCUIT_RESET_SECONDS - 1
+    return state
+
+
+@pytest.mark.anyio
+async def test_half_open_circuit_admits_a_single_trial(monkeypatch):
+    calls = []
+
+    async def slow_groq(system_prompt, user_prompt, max_tokens):
+        calls.append("groq")
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    monkeypatch.setitem(api.PROVIDER_CALLS, "groq", slow_groq)
+    monkeypatch.setitem(api.provider_states, "groq", half_open_state("groq"))
+    results = await asyncio.gather(
+        *[api.call_provider("groq", "system", "prompt", 10) for _ in range(3)], return_exceptions=True
+    )
+    assert calls == ["groq"]
+    assert results.count("ok") == 1
+    assert sum(isinstance(result, api.ProviderUnavailableError) for result in results) == 2
+    assert api.provider_states["groq"].circuit == "closed"
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Both providers configured with fresh circuits; `providers.behaviour[name]` is a delay or an exception."""
+    class Providers:
+        behaviour = {"groq": 0, "openrouter": 0}
+        calls = []
+
+    def fake(name):
+        async def call(system_prompt, user_prompt, max_tokens):
+            Providers.calls.append(name)
+            outcome = Providers.behaviour[name]
+            if isinstance(outcome, Exception):
+                raise outcome
+            await asyncio.sleep(outcome)
+            return f"answer from {name}"
+        return call
+
+    monkeypatch.setattr(api, "AI_PROVIDER", "groq")
+    monkeypatch.setattr(api, "PROVIDER_FAILOVER", True)
+    monkeypatch.setattr(api, "HEDGE_AFTER_SECONDS", 0.05)
+    monkeypatch.setattr(api, "llm_scheduler", api.LLMScheduler(0, 0, 0))
+    for name in ("groq", "openrouter"):
+        monkeypatch.setitem(api.PROVIDER_CALLS, name, fake(name))
+        monkeypatch.setitem(api.provider_states, name, api.ProviderState(name, True))
+    Providers.calls = []
+    return Providers
+
+
+@pytest.mark.parametrize("value, seconds", [("12", 12), ("7.66s", 7.66), ("2m59.56s", 179.56), ("1h2m3s", 3723),
+                                            ("250ms", 0.25), ("soon", None)])
+def test_parse_duration(value, seconds):
+    assert api.parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+@pytest.mark.parametrize("headers, seconds", [
+    ({"retry-after": "20"}, 20),
+    ({"retry-after": "Thu, 01 Jan 1970 00:00:00 GMT"}, 0),
+    ({"x-ratelimit-reset-requests": "2s", "x-ratelimit-reset-tokens": "1m"}, 60),
+    ({"x-ratelimit-reset": str(int((time.time() + 30) * 1000))}, 30),
+    ({}, None),
+])
+def test_parse_retry_after(headers, seconds):
+    result = api.parse_retry_after(api.httpx.Headers(headers))
+    assert result == (pytest.approx(seconds, abs=1) if seconds is not None else None)
+
+
+def test_rate_limit_response_raises_with_its_retry_after():
+    request = api.httpx.Request("POST", "https://example.com")
+    with pytest.raises(api.RateLimitError) as error:
+        api.check_chat_response("groq", api.httpx.Response(429, headers={"retry-after": "7"}, request=request))
+    assert error.value.retry_after == 7
+    with pytest.raises(api.RateLimitError) as error:
+        api.check_chat_response("groq", api.httpx.Response(503, request=request))
+    assert error.value.retry_after == api.RATE_LIMIT_DEFAULT_BACKOFF
+
+
+def test_circuit_opens_after_consecutive_failures_and_closes_on_success():
+    state = api.ProviderState("groq", True)
+    for _ in range(api.CIRCUIT_FAILURE_THRESHOLD - 1):
+        state.record_failure()
+    assert state.circuit == "closed" and state.available()
+    state.record_failure()
+    assert state.circuit == "open" and not state.available()
+    state.opened_at -= api.CIRCUIT_RESET_SECONDS
+    assert state.circuit == "half-open" and state.available()
+    state.record_success()
+    assert state.circuit == "closed" and state.failures == 0
+
+
+@pytest.mark.anyio
+async def test_failover_to_the_secondary_provider_on_errors(providers):
+    providers.behaviour["groq"] = RuntimeError("HTTP 500")
+    assert await api.route_ai_call("system", "prompt") == "answer from openrouter"
+    assert providers.calls == ["groq", "openrouter"]
+    assert api.provider_states["groq"].failures == 1
+
+
+@pytest.mark.anyio
+async def test_error_from_both_providers_is_raised(providers):
+    providers.behaviour.update(groq=RuntimeError("groq down"), openrouter=RuntimeError("openrouter down"))
+    with pytest.raises(RuntimeError, match="openrouter down"):
+        await api.route_ai_call("system", "prompt")
+
+
+@pytest.mark.anyio
+async def test_slow_primary_is_hedged_and_the_loser_cancelled(providers):
+    providers.behaviour["groq"] = 1
+    context = api.set_llm_call_section("Projects")
+    assert await api.route_ai_call("system", "prompt") == "answer from openrouter"
+    assert context["provider"] == "openrouter"
+    assert not api.provider_states["groq"].trial_in_flight
+
+
+@pytest.mark.anyio
+async def test_rate_limited_primary_is_skipped(providers):
+    providers.behaviour["groq"] = api.RateLimitError("groq rate limited", 60)
+    assert await api.route_ai_call("system", "prompt") == "answer from openrouter"
+    assert api.provider_states["groq"].rate_limited_for() > 50
+    providers.calls.clear()
+    assert await api.route_ai_call("system", "prompt") == "answer from openrouter"
+    assert providers.calls == ["openrouter"]
+
+
+@pytest.mark.anyio
+async def test_no_available_provider_raises(providers, monkeypatch):
+    for name in ("groq", "openrouter"):
+        monkeypatch.setitem(api.provider_states, name, api.ProviderState(name, False))
+    with pytest.raises(api.ProviderUnavailableError):
+        await api.route_ai_call("system", "prompt")
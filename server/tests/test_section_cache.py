@@ -0,0 +1,93 @@
+import sqlite3
+
+import pytest
+
+import resume_generator_api as api
+
+
+@pytest.mark.anyio
+async def test_failover_result_is_cached_under_the_answering_model(monkeypatch):
+    failover = next(name for name in api.PROVIDER_MODELS if api.PROVIDER_MODELS[name] != api.active_model())
+
+    async def answered_by_failover(system_prompt, user_prompt, max_tokens=1500):
+        api.llm_call_context.get()["provider"] = failover
+        return "\\section{Projects}\nCache Tester"
+
+    monkeypatch.setattr(api, "call_ai_api", answered_by_failover)
+    monkeypatch.setattr(api, "section_cache", api.SectionCache(api.MemorySectionCacheBackend(10), 3600))
+    content = await api.generate_section("Projects", "Cache failover job", "Cache failover resume")
+
+    system, prompt, primary_key = api.section_request("Projects", "Cache failover job", "Cache failover resume")
+    failover_key = api.SectionCache.make_key("Projects", api.PROVIDER_MODELS[failover], system, prompt)
+    assert await api.section_cache.get(primary_key) is None
+    assert await api.section_cache.get(failover_key) == content
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Record prompts sent to the LLM, which answers with a numbered Projects section."""
+    calls = []
+
+    async def call_ai_api(system_prompt, user_prompt, max_tokens=1500):
+        calls.append(user_prompt)
+        return f"\\section{{Projects}}\nProject {len(calls)}"
+
+    monkeypatch.setattr(api, "call_ai_api", call_ai_api)
+    monkeypatch.setattr(api, "section_cache", api.SectionCache(api.MemorySectionCacheBackend(10), 3600))
+    return calls
+
+
+@pytest.mark.anyio
+async def test_cached_section_is_reused_for_identical_inputs(llm_calls):
+    first = await api.generate_section("Projects", "Cache job", "Cache resume")
+    assert await api.generate_section("Projects", "Cache job", "Cache resume") == first
+    assert len(llm_calls) == 1
+    await api.generate_section("Projects", "Another job", "Cache resume")
+    assert len(llm_calls) == 2
+
+
+@pytest.mark.anyio
+async def test_use_cache_false_regenerates_and_replaces_the_entry(llm_calls):
+    await api.generate_section("Projects", "Cache job", "Cache resume")
+    fresh = await api.generate_section("Projects", "Cache job", "Cache resume", use_cache=False)
+    assert fresh == "\\section{Projects}\nProject 2"
+    assert await api.generate_section("Projects", "Cache job", "Cache resume") == fresh
+    assert len(llm_calls) == 2
+
+
+def test_key_covers_prompt_version_model_and_prompts(monkeypatch):
+    key = api.SectionCache.make_key("Projects", "model-a", "system", "prompt")
+    assert api.SectionCache.make_key("Projects", "model-b", "system", "prompt") != key
+    assert api.SectionCache.make_key("Projects", "model-a", "system", "other prompt") != key
+    monkeypatch.setattr(api, "PROMPT_VERSION", "next")
+    assert api.SectionCache.make_key("Projects", "model-a", "system", "prompt") != key
+
+
+def test_memory_backend_expires_and_evicts_least_recently_used():
+    backend = api.MemorySectionCacheBackend(2)
+    backend.set("a", "A", 3600)
+    backend.set("b", "B", 3600)
+    backend.get("a")
+    backend.set("c", "C", 3600)
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == ("A", None, "C")
+    backend.set("old", "O", -1)
+    assert backend.get("old") is None
+
+
+def test_sqlite_backend_round_trips_and_expires(tmp_path):
+    backend = api.SqliteSectionCacheBackend(str(tmp_path / "sections.sqlite3"), 10)
+    backend.set("a", "A", 3600)
+    backend.set("old", "O", -1)
+    assert backend.get("a") == "A"
+    assert backend.get("old") is None
+    assert backend.get("missing") is None
+
+
+@pytest.mark.anyio
+async def test_failing_backend_write_does_not_fail_generation(llm_calls):
+    class BrokenBackend(api.MemorySectionCacheBackend):
+        def set(self, key, value, ttl):
+            raise sqlite3.OperationalError("database is locked")
+
+    api.section_cache = api.SectionCache(BrokenBackend(10), 3600)
+    assert await api.generate_section("Projects", "Cache job", "Cache resume") == "\\section{Projects}\nProject 1"
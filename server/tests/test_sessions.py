@@ -0,0 +1,70 @@
+import pytest
+
+import resume_generator_api as api
+
+
+def test_preview_format_is_case_insensitive(client, session_id):
+    response = client.get(f"/sessions/{session_id}/preview", params={"format": "JSON"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+
+
+def test_preview_rejects_pdf_in_any_case(client, session_id):
+    for value in ("pdf", "PDF"):
+        assert client.get(f"/sessions/{session_id}/preview", params={"format": value}).status_code == 400
+
+
+def section_latex(client, session_id, name):
+    sections = client.get(f"/sessions/{session_id}").json()["sections"]
+    return next(section["latex"] for section in sections if section["name"] == name)
+
+
+def test_edited_section_is_recompiled_and_kept(client, session_id, monkeypatch, tmp_path):
+    compiled = []
+
+    async def compile_session(session):
+        compiled.append(session["sections"])
+        pdf = tmp_path / "resume.pdf"
+        pdf.write_bytes(b"%PDF-1.4\n")
+        return str(pdf), 2
+
+    monkeypatch.setattr(api, "compile_session", compile_session)
+    latex = "\\section{Projects}\nResume Builder"
+    response = client.post(f"/sessions/{session_id}/sections", data={"section": "Projects", "latex": latex})
+    assert response.status_code == 200
+    assert response.headers["x-latex-passes"] == "2"
+    assert response.headers["x-session-id"] == session_id
+    assert compiled == [{"Projects": latex}]
+    assert section_latex(client, session_id, "Projects") == latex
+
+
+def test_regenerated_section_replaces_the_previous_one(client, session_id, monkeypatch):
+    async def generate_section(section, job_description, resume_text, use_cache=True, profile=None):
+        assert not use_cache
+        return "\\section{Projects}\nRegenerated"
+
+    monkeypatch.setattr(api, "generate_section", generate_section)
+    response = client.post(f"/sessions/{session_id}/sections", data={"section": "Projects", "output_format": "json"})
+    assert response.status_code == 200
+    assert section_latex(client, session_id, "Projects") == "\\section{Projects}\nRegenerated"
+
+
+def test_failed_regeneration_keeps_the_previous_section(client, session_id, monkeypatch):
+    async def generate_section(section, *args, **kwargs):
+        return api.generate_fallback_section(section)
+
+    monkeypatch.setattr(api, "generate_section", generate_section)
+    response = client.post(f"/sessions/{session_id}/sections", data={"section": "Projects", "output_format": "json"})
+    assert response.status_code == 502
+    assert section_latex(client, session_id, "Projects") == "\\section{Projects}\nJob Tracker"
+
+
+@pytest.mark.parametrize("path, data, status", [
+    ("{session_id}", {"section": "Hobbies", "latex": "x"}, 400),
+    ("{session_id}", {"section": "Projects", "latex": "\\section{Projects}\n\\textbf{unclosed"}, 400),
+    ("00000000-0000-0000-0000-000000000000", {"section": "Projects", "latex": "x"}, 404),
+    ("not-a-session", {"section": "Projects", "latex": "x"}, 404),
+])
+def test_section_update_errors(client, session_id, path, data, status):
+    response = client.post(f"/sessions/{path.format(session_id=session_id)}/sections", data=data)
+    assert response.status_code == status
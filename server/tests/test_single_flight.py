@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+import resume_generator_api as api
+
+
+class Calls:
+    def __init__(self, result="resume.pdf", delay=0.05):
+        self.count = 0
+        self.result = result
+        self.delay = delay
+        self.cancelled = False
+
+    async def run(self):
+        self.count += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class DisconnectedRequest:
+    async def is_disconnected(self):
+        return True
+
+
+@pytest.mark.anyio
+async def test_identical_concurrent_calls_share_one_run():
+    flights = api.SingleFlight()
+    calls = Calls()
+    results = await asyncio.gather(*(flights.do("key", calls.run) for _ in range(3)), flights.do("other", calls.run))
+    assert results == ["resume.pdf"] * 4
+    assert calls.count == 2
+    assert flights.snapshot() == {"in_flight": 0, "coalesced": 2}
+
+
+@pytest.mark.anyio
+async def test_errors_reach_every_caller_and_are_not_cached():
+    flights = api.SingleFlight()
+    calls = Calls(result=RuntimeError("AI call failed"))
+    results = await asyncio.gather(flights.do("key", calls.run), flights.do("key", calls.run), return_exceptions=True)
+    assert [str(result) for result in results] == ["AI call failed"] * 2
+    calls.result = "resume.pdf"
+    assert await flights.do("key", calls.run) == "resume.pdf"
+    assert calls.count == 2
+
+
+@pytest.mark.anyio
+async def test_shared_call_is_cancelled_only_when_every_caller_leaves():
+    flights = api.SingleFlight()
+    calls = Calls(delay=0.2)
+    first = asyncio.create_task(flights.do("key", calls.run))
+    second = asyncio.create_task(flights.do("key", calls.run))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "resume.pdf"
+    assert not calls.cancelled
+
+    lone = asyncio.create_task(flights.do("key", calls.run))
+    await asyncio.sleep(0.01)
+    lone.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await lone
+    await asyncio.sleep(0)
+    assert calls.cancelled
+    assert flights.snapshot()["in_flight"] == 0
+
+
+@pytest.mark.anyio
+async def test_disconnected_client_stops_waiting(monkeypatch):
+    monkeypatch.setattr(api, "DISCONNECT_POLL_INTERVAL", 0.01)
+    flights = api.SingleFlight()
+    calls = Calls(delay=0.2)
+    with pytest.raises(api.ClientDisconnected):
+        await flights.do("key", calls.run, DisconnectedRequest())
+    await asyncio.sleep(0)
+    assert calls.cancelled
+
+
+def test_fingerprint_covers_the_upload_and_every_field(tmp_path):
+    upload = tmp_path / "resume.pdf"
+    upload.write_bytes(b"%PDF-1.4\n")
+    key = api.request_fingerprint(str(upload), name="Jane", job_description="Backend")
+    assert api.request_fingerprint(str(upload), job_description="Backend", name="Jane") == key
+    assert api.request_fingerprint(str(upload), name="Jane", job_description="Frontend") != key
+    upload.write_bytes(b"%PDF-1.5\n")
+    assert api.request_fingerprint(str(upload), name="Jane", job_description="Backend") != key
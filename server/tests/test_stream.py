@@ -0,0 +1,96 @@
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import resume_generator_api as api
+from bench import stub_llm
+
+FORM = {
+    "name": "Jane Doe", "email": "jane@example.com", "phone": "555", "linkedin_link": "https://linkedin.com/in/jane",
+    "location": "Remote", "job_description": "Backend engineer",
+}
+RESUME = {"resume_file": ("resume.pdf", b"%PDF-1.4\n", "application/pdf")}
+
+
+def read_events(response):
+    events = []
+    for message in response.text.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def extract(monkeypatch):
+    async def extract_text_from_file(path):
+        return "Resume text"
+
+    monkeypatch.setattr(api, "extract_text_from_file", extract_text_from_file)
+
+
+def test_stream_reports_each_stage_then_done(client, monkeypatch, extract):
+    async def render(*args, progress, **kwargs):
+        progress("section", section="Experience", completed=1, total=1)
+        progress("session", session_id="abc")
+        progress("compiled", latex_passes=2)
+        return "/tmp/Jane_Doe.pdf", "Jane Doe.pdf"
+
+    monkeypatch.setattr(api, "render_resume_pdf", render)
+    response = client.post("/generate-resume/stream", data=FORM, files=RESUME)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    assert [event for event, _ in events] == ["extracting", "extracted", "section", "session", "compiled", "done"]
+    assert events[1][1] == {"characters": len("Resume text")}
+    assert events[-1][1] == {"session_id": "abc", "filename": "Jane Doe.pdf", "resume_url": "/resumes/Jane%20Doe.pdf",
+                             "latex_passes": 2, "prompt_tokens": 0}
+
+
+@pytest.mark.parametrize("error, status, detail", [
+    (HTTPException(status_code=502, detail="Compilation failed"), 502, "Compilation failed"),
+    (RuntimeError("AI call failed"), 500, "Internal server error: AI call failed"),
+])
+def test_stream_ends_with_an_error_event(client, monkeypatch, extract, error, status, detail):
+    async def render(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(api, "render_resume_pdf", render)
+    events = read_events(client.post("/generate-resume/stream", data=FORM, files=RESUME))
+    assert events[-1] == ("error", {"status": status, "detail": detail})
+
+
+def test_stream_rejects_bad_requests_before_streaming(client):
+    response = client.post("/generate-resume/stream", data={**FORM, "generation_mode": "parallel"}, files=RESUME)
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def stub_http_client(monkeypatch):
+    monkeypatch.setitem(stub_llm.config, "latency", 0)
+    monkeypatch.setitem(stub_llm.config, "jitter", 0)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_llm.app), base_url="http://stub")
+    monkeypatch.setattr(api, "get_http_client", lambda: client)
+    return client
+
+
+@pytest.mark.anyio
+async def test_streamed_completion_forwards_deltas(stub_http_client):
+    deltas = []
+    api.set_llm_call_section("Experience")
+    api.llm_token_listener.set(lambda section, call_id, delta: deltas.append((section, delta)))
+    _, prompt = api.build_section_prompts("Experience", "Backend engineer", "Resume text")
+    payload = {"model": "stub", "messages": [{"role": "user", "content": prompt}], "stream": True}
+    content = await api.stream_chat_completion("groq", "http://stub/v1/chat/completions", {}, payload)
+    assert content == stub_llm.SECTION_BODIES["Experience"]
+    assert len(deltas) > 1 and {section for section, _ in deltas} == {"Experience"}
+    assert "".join(delta for _, delta in deltas).strip() == content
+
+
+@pytest.mark.anyio
+async def test_streamed_completion_raises_on_rate_limits(stub_http_client, monkeypatch):
+    monkeypatch.setitem(stub_llm.config, "rate_limit_rate", 1)
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "prompt"}], "stream": True}
+    with pytest.raises(api.RateLimitError):
+        await api.stream_chat_completion("groq", "http://stub/v1/chat/completions", {}, payload)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import resume_generator_api as api
+from bench import stub_llm
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setitem(stub_llm.config, "latency", 0)
+    monkeypatch.setitem(stub_llm.config, "jitter", 0)
+    return TestClient(stub_llm.app)
+
+
+def complete(stub, prompt, **payload):
+    messages = [{"role": "system", "content": api.SECTION_SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+    return stub.post("/v1/chat/completions", json={"model": "stub", "messages": messages, **payload})
+
+
+@pytest.mark.parametrize("shape", ["valid", "fenced"])
+@pytest.mark.parametrize("section", [s["name"] for s in api.RESUME_SECTIONS])
+def test_stub_sections_pass_validation(stub, monkeypatch, shape, section):
+    monkeypatch.setitem(stub_llm.config, "shape", shape)
+    system, prompt = api.build_section_prompts(section, "Backend engineer", "Resume text")
+    response = complete(stub, prompt)
+    assert response.status_code == 200
+    content = api.clean_section_output(response.json()["choices"][0]["message"]["content"])
+    assert api.section_is_valid(section, content)
+
+
+def test_stub_answers_profile_and_multi_section_prompts(stub):
+    profile = json.loads(complete(stub, api.build_profile_prompt("Backend engineer", "Resume text"))
+                         .json()["choices"][0]["message"]["content"])
+    assert set(profile) == {"job", "candidate"}
+
+    names = ["Professional Summary", "Experience"]
+    content = complete(stub, api.build_multi_section_prompt(names, "Backend engineer", "Resume text")) \
+        .json()["choices"][0]["message"]["content"]
+    sections = api.split_multi_section_output(content)
+    assert list(sections) == names
+    assert all(api.section_is_valid(name, sections[name]) for name in names)
+
+
+def test_stub_streams_the_same_content(stub):
+    _, prompt = api.build_section_prompts("Experience", "Backend engineer", "Resume text")
+    expected = complete(stub, prompt).json()["choices"][0]["message"]["content"]
+    events = [line[len("data: "):] for line in complete(stub, prompt, stream=True).text.splitlines()
+              if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks) == expected
+    assert chunks[-1]["usage"]["completion_tokens"] > 0
+
+
+def test_stub_failures(stub, monkeypatch):
+    monkeypatch.setitem(stub_llm.config, "error_rate", 1)
+    assert complete(stub, "prompt").status_code == 500
+
+    monkeypatch.setitem(stub_llm.config, "error_rate", 0)
+    monkeypatch.setitem(stub_llm.config, "rate_limit_rate", 1)
+    with pytest.raises(api.RateLimitError) as error:
+        api.check_chat_response("groq", complete(stub, "prompt"))
+    assert error.value.retry_after == 1
+
+    monkeypatch.setitem(stub_llm.config, "rate_limit_rate", 0)
+    monkeypatch.setitem(stub_llm.config, "shape", "invalid")
+    _, prompt = api.build_section_prompts("Experience", "Backend engineer", "Resume text")
+    content = complete(stub, prompt).json()["choices"][0]["message"]["content"]
+    assert not api.section_is_valid("Experience", content)
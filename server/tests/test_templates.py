@@ -0,0 +1,48 @@
+import pytest
+
+from resume_generator_api import CompiledTemplate, escape_latex_text, escape_latex_url
+
+CONTACT = {"Name": "R&D_Lab {x}", "Email": "a_b%c@x.com", "Phone": "", "Location": "",
+           "LinkedinLink": "https://x.com/in/jane doe#top", "AI Content": "\\section{X} 50\\%"}
+
+
+def test_escape_latex_text_escapes_every_special():
+    assert escape_latex_text("R&D_Lab {x} 100% ~\\ ^#$") == \
+        "R\\&D\\_Lab \\{x\\} 100\\% \\textasciitilde{}\\textbackslash{} \\^{}\\#\\$"
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://x.com/a_b?q=50%#top", "https://x.com/a_b?q=50\\%\\#top"),
+    ("https://x.com/in/jane doe", "https://x.com/in/janedoe"),
+    ("https://x.com/}\\input{/etc/passwd", "https://x.com/input/etc/passwd"),
+])
+def test_escape_latex_url_keeps_the_link_usable(url, expected):
+    assert escape_latex_url(url) == expected
+
+
+def test_render_escapes_contact_fields_by_context():
+    template = CompiledTemplate("test", "test.tex", (
+        "\\documentclass{article}\n% end-of-precompiled-preamble\n\\begin{document}\n"
+        "{Name} \\href{mailto:{Email}}{{Email}} \\href{{LinkedinLink}}{LinkedIn}\n{AI Content}\n\\end{document}\n"
+    ), (0, 0))
+    assert template.preamble == "\\documentclass{article}\n"
+    assert template.render(CONTACT) == (
+        "% end-of-precompiled-preamble\n\\begin{document}\n"
+        "R\\&D\\_Lab \\{x\\} \\href{mailto:a_b\\%c@x.com}{a\\_b\\%c@x.com} "
+        "\\href{https://x.com/in/janedoe\\#top}{LinkedIn}\n\\section{X} 50\\%\n\\end{document}\n"
+    )
+
+
+def test_placeholder_in_preamble_keeps_the_whole_template_per_request():
+    source = "\\documentclass{article}\\title{{Name}}\n\\begin{document}{Name}\\end{document}"
+    template = CompiledTemplate("test", "test.tex", source, (0, 0))
+    assert template.preamble == ""
+    assert template.render({"Name": "A_B"}) == "\\documentclass{article}\\title{A\\_B}\n\\begin{document}A\\_B\\end{document}"
+
+
+def test_template_without_marker_is_not_precompiled(caplog):
+    source = "\\documentclass{article}\n\\input{glyphtounicode}\n\\begin{document}{Name}\\end{document}"
+    template = CompiledTemplate("plain", "plain.tex", source, (0, 0))
+    assert template.preamble == ""
+    assert template.render({"Name": "Jane"}) == source.replace("{Name}", "Jane")
+    assert any("end-of-precompiled-preamble" in record.getMessage() for record in caplog.records)
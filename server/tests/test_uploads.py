@@ -0,0 +1,29 @@
+import pytest
+from fastapi import HTTPException
+
+import resume_generator_api as api
+
+FORM = {
+    "name": "Jane Doe", "email": "jane@example.com", "phone": "555", "linkedin_link": "https://linkedin.com/in/jane",
+    "location": "Remote", "job_description": "Backend engineer",
+}
+
+
+@pytest.mark.parametrize("path", ["/generate-resume", "/jobs"])
+def test_unsupported_upload_is_rejected_with_400(client, path):
+    queued = len(api.jobs)
+    response = client.post(path, data=FORM, files={"resume_file": ("resume.txt", b"plain text", "text/plain")})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unsupported file format: .txt"
+    assert len(api.jobs) == queued
+
+
+def test_http_errors_from_generation_keep_their_status(client, monkeypatch):
+    async def unreadable(*args, **kwargs):
+        raise HTTPException(status_code=400, detail="Could not read the resume")
+
+    monkeypatch.setattr(api, "build_resume_pdf", unreadable)
+    response = client.post("/generate-resume", data=FORM,
+                           files={"resume_file": ("resume.pdf", b"%PDF-1.4\n", "application/pdf")})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Could not read the resume"